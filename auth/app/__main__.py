@@ -2,9 +2,37 @@ import uvicorn
 
 from app.api import srv, v1
 from app.application import Application
+from app.hashing import hasher
+from app.http_client import http_client
+from app.kafka import producer
+from app.registry import registry
+from app.relay import relay
+from app.revocation import revocation_listener
 from app.settings import get_settings
+from app.versions import versions
 
-app = Application(get_settings())
+app = Application(
+    get_settings(),
+    on_startup=[
+        # Before anything starts threads the pool workers would inherit
+        hasher.start,
+        producer.start,
+        http_client.start,
+        registry.start,
+        revocation_listener.start,
+        versions.start,
+        relay.start,
+    ],
+    on_shutdown=[
+        relay.stop,
+        versions.stop,
+        hasher.stop,
+        registry.stop,
+        revocation_listener.stop,
+        http_client.stop,
+        producer.stop,
+    ],
+)
 app.register_endpoints(srv, v1)
 
 if __name__ == '__main__':
@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from app.keys import get_jwks
+from app.settings import get_settings
+
+router = APIRouter()
+
+
+@router.get('/jwks.json')
+async def get_key_set(response: Response) -> dict[str, Any]:
+    max_age = int(get_settings().jwt.JWKS_MAX_AGE.total_seconds())
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return get_jwks()
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.http_client import http_client
+
+router = APIRouter()
+
+
+@router.get('/')
+async def get_metrics() -> dict[str, dict[str, int | float]]:
+    return {'http': http_client.stats()}
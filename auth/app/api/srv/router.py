@@ -1,8 +1,12 @@
 from fastapi import APIRouter
 
+from .jwks import router as jwks_router
+from .metrics import router as metrics_router
 from .services import router as services_router
 from .sso import router as sso_router
 
 router = APIRouter(prefix='/srv', tags=['SRV'])
 router.include_router(sso_router, prefix='/sso')
 router.include_router(services_router, prefix='/services')
+router.include_router(jwks_router, prefix='/.well-known')
+router.include_router(metrics_router, prefix='/metrics')
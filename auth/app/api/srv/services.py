@@ -7,6 +7,7 @@ from pydantic import BaseModel, ConfigDict, Field
 
 from app.db import AsyncSession, get_session
 from app.models.entities import AuthorizedService
+from app.registry import notify_changed, registry
 
 router = APIRouter()
 
@@ -32,5 +33,7 @@ async def create_service(
 ) -> ServiceSchema:
     service = AuthorizedService(secret=uuid4())
     db_session.add(service)
+    await notify_changed(db_session)
     await db_session.commit()
+    registry.invalidate()
     return ServiceSchema.model_validate(service)
@@ -1,41 +1,40 @@
+import secrets
 from datetime import UTC, datetime
+from hashlib import sha256
 from typing import Annotated, cast
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import sqlalchemy as sa
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Form, status
 from fastapi.exceptions import HTTPException
 from fastapi.security.oauth2 import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from pydantic import BaseModel, Field
+from sqlalchemy.dialects import postgresql
 
 from app.db import AsyncSession, get_session
-from app.models.entities import Account, AuthorizedService
+from app.hashing import verify_password
+from app.keys import get_signing_key, get_verification_keys
+from app.models.entities import Account, AuthorizedService, RefreshToken
+from app.models.enums import Role
+from app.registry import registry
+from app.revocation import revocations, revoke_tokens
 from app.settings import get_settings
+from app.throttling import login_throttle
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+MAX_BATCH_SIZE = 1000
 
 router = APIRouter()
 
 
 async def get_service(
-    form: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db_session: Annotated[AsyncSession, Depends(get_session)],
+    client_id: Annotated[str | None, Form()] = None,
+    client_secret: Annotated[str | None, Form()] = None,
 ) -> AuthorizedService:
-    client_id, client_secret = form.client_id, form.client_secret
-
-    if client_id is None or client_secret is None:
-        raise HTTPException(
-            status.HTTP_403_FORBIDDEN,
-            detail='Клиенту отказано в доступе',
-        )
+    service = None
+    if client_id is not None and client_secret is not None:
+        service = await registry.get(client_id, client_secret)
 
-    result = await db_session.execute(
-        sa.select(AuthorizedService)
-        .where(AuthorizedService.id_ == client_id)
-        .where(AuthorizedService.secret == client_secret),
-    )
-    service = result.scalar()
     if not service:
         raise HTTPException(
             status.HTTP_403_FORBIDDEN,
@@ -45,7 +44,7 @@ async def get_service(
     return service
 
 
-@router.post('/token')
+@router.post('/token', dependencies=[Depends(login_throttle)])
 async def login(
     form: Annotated[OAuth2PasswordRequestForm, Depends()],
     db_session: Annotated[AsyncSession, Depends(get_session)],
@@ -55,22 +54,112 @@ async def login(
         sa.select(Account).where(Account.username == form.username),
     )
     account = result.scalar()
-    if not account or not pwd_context.verify(form.password, account.encrypted_password):
+    if not account:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
+    async with login_throttle.hashing():
+        verified = await verify_password(form.password, account.encrypted_password)
+    if not verified:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
+    refresh_token = issue_refresh_token(db_session, account.pid, family=uuid4())
+    await db_session.commit()
+    return create_token_response(account, refresh_token)
+
+
+@router.post('/refresh')
+async def refresh(
+    refresh_token: Annotated[str, Form()],
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+    _: Annotated[AuthorizedService, Depends(get_service)],
+) -> dict:
+    '''Exchange a refresh token for a new token pair, rotating it'''
+
+    result = await db_session.execute(
+        sa.select(RefreshToken, Account)
+        .join(Account, Account.pid == RefreshToken.account_pid)
+        .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+        .where(RefreshToken.expires_at > datetime.now(UTC))
+        .with_for_update(of=RefreshToken),
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
+    token, account = row.tuple()
+    if token.used:
+        # A rotated token came back, so the whole family is compromised
+        await db_session.execute(
+            sa.update(RefreshToken)
+            .where(RefreshToken.family == token.family)
+            .values(used=True),
+        )
+        revoke_tokens(db_session, account.pid)
+        await db_session.commit()
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    return {'access_token': create_access_token(account)}
+    token.used = True
+    new_token = issue_refresh_token(db_session, account.pid, family=token.family)
+    await db_session.commit()
+    return create_token_response(account, new_token)
+
+
+def hash_refresh_token(token: str) -> str:
+    return sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db_session: AsyncSession, pid: UUID, family: UUID) -> str:
+    token = secrets.token_urlsafe(32)
+    db_session.add(
+        RefreshToken(
+            token_hash=hash_refresh_token(token),
+            account_pid=pid,
+            family=family,
+            expires_at=datetime.now(UTC) + get_settings().jwt.REFRESH_LIFETIME,
+        ),
+    )
+    return token
+
+
+def create_token_response(account: Account, refresh_token: str) -> dict:
+    return {
+        'access_token': create_access_token(account),
+        'token_type': 'bearer',
+        'expires_in': int(get_settings().jwt.LIFETIME.total_seconds()),
+        'refresh_token': refresh_token,
+    }
 
 
 def create_access_token(account: Account) -> str:
+    key = get_signing_key()
+    now = datetime.now(UTC)
     return jwt.encode(
         {
             'sub': str(account.pid),
-            'exp': datetime.now(UTC) + get_settings().jwt.LIFETIME,
+            'role': account.role,
+            'iat': now.timestamp(),
+            'exp': now + get_settings().jwt.LIFETIME,
         },
-        get_settings().jwt.SECRET,
+        key.private_key,
+        algorithm=key.algorithm,
+        headers={'kid': key.kid},
     )
 
 
+def decode_token(token: str) -> dict:
+    '''Verify the token signature and expiration, return its claims'''
+
+    key = get_verification_keys().get(jwt.get_unverified_header(token).get('kid'))
+    if key is None:
+        raise JWTError('Unknown signing key')
+
+    claims = jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+    if revocations.is_revoked(UUID(claims['sub']), float(claims.get('iat', 0))):
+        raise JWTError('Token has been revoked')
+
+    return claims
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
 
@@ -85,15 +174,51 @@ async def verify_token(
         headers={'WWW-Authenticate': 'Bearer'},
     )
     try:
-        payload = jwt.decode(token, key=get_settings().jwt.SECRET)
+        payload = decode_token(token)
     except JWTError as e:
         raise credentials_exception from e
 
     pid = cast(UUID, payload['sub'])
-    exp = datetime.fromtimestamp(int(payload['exp']), tz=UTC)
-    if exp < datetime.now(UTC):
+    result = await db_session.execute(sa.select(Account.id_).where(Account.pid == pid))
+    if not result.scalar():
         raise credentials_exception
 
-    account = await db_session.execute(sa.select(Account).where(Account.pid == pid))
-    if not account:
-        raise credentials_exception
+
+class VerifyBatchSchema(BaseModel):
+    tokens: list[str] = Field(max_length=MAX_BATCH_SIZE)
+
+
+class VerifiedTokenSchema(BaseModel):
+    valid: bool
+    pid: UUID | None = None
+    role: Role | None = None
+
+
+@router.post('/verify/batch')
+async def verify_tokens(
+    body: VerifyBatchSchema,
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+) -> list[VerifiedTokenSchema]:
+    pids: list[UUID | None] = []
+    for token in body.tokens:
+        try:
+            pids.append(UUID(decode_token(token)['sub']))
+        except (JWTError, KeyError, ValueError):
+            pids.append(None)
+
+    roles: dict[UUID, Role] = {}
+    if known := {pid for pid in pids if pid}:
+        candidates = sa.literal(list(known), postgresql.ARRAY(sa.UUID(as_uuid=True)))
+        result = await db_session.execute(
+            sa.select(Account.pid, Account.role).where(
+                Account.pid == sa.any_(candidates),
+            ),
+        )
+        roles = dict(result.tuples().all())
+
+    return [
+        VerifiedTokenSchema(valid=True, pid=pid, role=roles[pid])
+        if pid in roles
+        else VerifiedTokenSchema(valid=False)
+        for pid in pids
+    ]
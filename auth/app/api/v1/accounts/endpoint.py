@@ -1,15 +1,15 @@
+from datetime import UTC, datetime
 from typing import Annotated
 from uuid import UUID, uuid4
 
 import sqlalchemy as sa
-from confluent_kafka import Producer
-from fastapi import APIRouter, Depends, HTTPException, status
-from passlib.context import CryptContext
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-from app.api.v1.deps import get_current_user
+from app.api.v1.deps import collection_etag, get_current_user
 from app.db import AsyncSession, get_session
-from app.kafka import get_producer
+from app.hashing import hash_password
 from app.models.entities import Account
+from app.models.enums import Role
 from app.models.events import (
     CreateAccountCUD,
     CreateAccountData,
@@ -19,37 +19,88 @@ from app.models.events import (
     UpdateAccountCUD,
     UpdateAccountData,
 )
+from app.outbox import publish
+from app.revocation import revoke_tokens
+from app.versions import versions
 
-from .schemas import GetSchema, PostSchema, PutSchema
+from .importer import (
+    CHUNK_SIZE,
+    ImportReportSchema,
+    import_chunk,
+    iter_lines,
+    iter_records,
+    validate_record,
+)
+from .schemas import GetSchema, PageSchema, PostSchema, PutSchema
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
 router = APIRouter()
 
 
+def _naive_utc(value: datetime) -> datetime:
+    '''Timestamp columns are naive UTC, offsets are converted away'''
+
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
 @router.get('/')
 async def get_accounts(
+    response: Response,
+    etag: Annotated[str | None, Depends(collection_etag('accounts'))],
     _: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-) -> list[GetSchema]:
-    result = await db_session.execute(sa.select(Account))
-    accounts = result.scalars().all()
-    return [
-        GetSchema.model_validate(account, from_attributes=True) for account in accounts
-    ]
+    cursor: Annotated[int | None, Query(description='next_cursor of a page')] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    role: Role | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    updated_from: datetime | None = None,
+    updated_to: datetime | None = None,
+) -> PageSchema:
+    query = sa.select(
+        Account.id_,
+        Account.pid,
+        Account.username,
+        Account.email,
+        Account.role,
+    )
+    if cursor is not None:
+        query = query.where(Account.id_ > cursor)
+    if role is not None:
+        query = query.where(Account.role == role)
+    if created_from is not None:
+        query = query.where(Account.created_at >= _naive_utc(created_from))
+    if created_to is not None:
+        query = query.where(Account.created_at < _naive_utc(created_to))
+    if updated_from is not None:
+        query = query.where(Account.updated_at >= _naive_utc(updated_from))
+    if updated_to is not None:
+        query = query.where(Account.updated_at < _naive_utc(updated_to))
+
+    # One extra row tells whether there is a next page
+    result = await db_session.execute(query.order_by(Account.id_).limit(limit + 1))
+    rows = result.all()
+    if etag:
+        response.headers.update({'ETag': etag, 'Cache-Control': 'private, no-cache'})
+    return PageSchema(
+        items=[GetSchema.model_validate(row) for row in rows[:limit]],
+        next_cursor=rows[limit - 1].id_ if len(rows) > limit else None,
+    )
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED)
 async def create_account(
     body: PostSchema,
     db_session: Annotated[AsyncSession, Depends(get_session)],
-    producer: Annotated[Producer, Depends(get_producer)],
 ) -> None:
-    pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
     account = Account(
         pid=uuid4(),
         username=body.username,
-        encrypted_password=pwd_context.hash(body.password.get_secret_value()),
+        encrypted_password=await hash_password(body.password.get_secret_value()),
         email=body.email,
         role=body.role,
     )
@@ -58,11 +109,52 @@ async def create_account(
         meta=EventMeta(name='Accounts.CreateAccount'),
         data=CreateAccountData.model_validate(account),
     )
-    producer.produce(
-        topic='accounts-stream',
-        value=event.model_dump_json(),
+    publish(db_session, 'accounts-stream', event)
+    await versions.bump(db_session, 'accounts')
+    await db_session.commit()
+
+
+@router.post('/import')
+async def import_accounts(
+    request: Request,
+    _: Annotated[Account, Depends(get_current_user)],
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+) -> ImportReportSchema:
+    '''Create accounts from a streamed NDJSON or CSV (`text/csv`) body'''
+
+    is_csv = request.headers.get('content-type', '').startswith('text/csv')
+    records = iter_records(iter_lines(request.stream()), is_csv=is_csv)
+    report = ImportReportSchema()
+
+    chunk: list[tuple[int, PostSchema]] = []
+    async for line, record in records:
+        if body := validate_record(line, record, report):
+            chunk.append((line, body))
+
+        if len(chunk) >= CHUNK_SIZE:
+            await _import_chunk(db_session, chunk, report)
+            chunk = []
+
+    if chunk:
+        await _import_chunk(db_session, chunk, report)
+
+    return report
+
+
+async def _import_chunk(
+    db_session: AsyncSession,
+    chunk: list[tuple[int, PostSchema]],
+    report: ImportReportSchema,
+) -> None:
+    publish(
+        db_session,
+        'accounts-stream',
+        *(
+            CreateAccountCUD(meta=EventMeta(name='Accounts.CreateAccount'), data=data)
+            for data in await import_chunk(db_session, chunk, report)
+        ),
     )
-    producer.flush()
+    await versions.bump(db_session, 'accounts')
     await db_session.commit()
 
 
@@ -72,7 +164,6 @@ async def _(
     body: PutSchema,
     _: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-    producer: Annotated[Producer, Depends(get_producer)],
 ) -> None:
     await db_session.execute(
         sa.update(Account).where(Account.pid == pid).values(**body.model_dump()),
@@ -85,11 +176,10 @@ async def _(
             role=body.role,
         ),
     )
-    producer.produce(
-        topic='accounts-stream',
-        value=event.model_dump_json(),
-    )
-    producer.flush()
+    publish(db_session, 'accounts-stream', event)
+    # Tokens carry the role, so the old ones must not outlive the change
+    revoke_tokens(db_session, pid)
+    await versions.bump(db_session, 'accounts')
     await db_session.commit()
 
 
@@ -98,7 +188,6 @@ async def _(
     pid: UUID,
     me: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-    producer: Annotated[Producer, Depends(get_producer)],
 ) -> None:
     if pid == me.pid:
         raise HTTPException(status.HTTP_409_CONFLICT, detail='Нельзя удалить себя же')
@@ -108,9 +197,7 @@ async def _(
         meta=EventMeta(name='Accounts.DeleteAccount'),
         data=DeleteAccountData(pid=pid),
     )
-    producer.produce(
-        topic='accounts-stream',
-        value=event.model_dump_json(),
-    )
-    producer.flush()
+    publish(db_session, 'accounts-stream', event)
+    revoke_tokens(db_session, pid)
+    await versions.bump(db_session, 'accounts')
     await db_session.commit()
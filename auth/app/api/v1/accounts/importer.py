@@ -0,0 +1,218 @@
+import asyncio
+import csv
+import json
+from collections import deque
+from collections.abc import AsyncIterator
+from uuid import uuid4
+
+import sqlalchemy as sa
+from pydantic import BaseModel, ValidationError
+
+from app.db import AsyncSession
+from app.hashing import hash_password
+from app.models.events import CreateAccountData
+
+from .schemas import PostSchema
+
+CHUNK_SIZE = 500
+
+COLUMNS = ('pid', 'username', 'encrypted_password', 'email', 'role')
+
+
+class ImportErrorSchema(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportReportSchema(BaseModel):
+    created: int = 0
+    errors: list[ImportErrorSchema] = []
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b''
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line
+
+    if buffer:
+        yield buffer
+
+
+class _PendingLines:
+    '''Lines of one CSV record at a time, for a reader kept across records'''
+
+    def __init__(self) -> None:
+        self.lines: deque[str] = deque()
+
+    def __iter__(self) -> '_PendingLines':
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+    def complete(self) -> bool:
+        # Quotes are doubled inside quoted fields, an odd count leaves one open
+        return sum(line.count('"') for line in self.lines) % 2 == 0
+
+
+async def _decode(
+    lines: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, str | UnicodeDecodeError]]:
+    number = 0
+    async for line in lines:
+        number += 1
+        try:
+            yield number, line.decode()
+        except UnicodeDecodeError as e:
+            yield number, e
+
+
+async def _ndjson_records(
+    lines: AsyncIterator[tuple[int, str | UnicodeDecodeError]],
+) -> AsyncIterator[tuple[int, object]]:
+    async for number, line in lines:
+        if isinstance(line, Exception):
+            yield number, line
+        elif line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, e
+
+
+async def _csv_records(
+    lines: AsyncIterator[tuple[int, str | UnicodeDecodeError]],
+) -> AsyncIterator[tuple[int, object]]:
+    pending = _PendingLines()
+    reader = csv.reader(pending)
+    header: list[str] | None = None
+    first = 0
+    async for number, line in lines:
+        if not pending.lines:
+            if isinstance(line, str) and not line.strip():
+                continue
+            first = number
+        if isinstance(line, Exception):
+            pending.lines.clear()
+            yield first, line
+            continue
+
+        pending.lines.append(f'{line}\n')
+        if not pending.complete():
+            continue
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            pending.lines.clear()
+            yield first, e
+            continue
+        if header is None:
+            header = values
+        else:
+            yield first, dict(zip(header, values, strict=False))
+
+    if pending.lines:
+        yield first, ValueError('Unterminated quoted field')
+
+
+def iter_records(
+    lines: AsyncIterator[bytes],
+    *,
+    is_csv: bool,
+) -> AsyncIterator[tuple[int, object]]:
+    '''Numbered raw records, NDJSON objects or CSV rows keyed by the header
+
+    A line that fails to decode or parse is yielded as its error. CSV
+    records are numbered by their first line, quoted fields may span lines.
+    '''
+
+    if is_csv:
+        return _csv_records(_decode(lines))
+    return _ndjson_records(_decode(lines))
+
+
+async def import_chunk(
+    db_session: AsyncSession,
+    chunk: list[tuple[int, PostSchema]],
+    report: ImportReportSchema,
+) -> list[CreateAccountData]:
+    '''Hash, COPY and insert one chunk, skipping rows that already exist'''
+
+    unique: dict[str, tuple[int, PostSchema]] = {}
+    for line, body in chunk:
+        if body.username in unique:
+            report.errors.append(
+                ImportErrorSchema(line=line, detail='Duplicate username in import'),
+            )
+        else:
+            unique[body.username] = (line, body)
+    chunk = list(unique.values())
+
+    # Bulk hashing waits for its share of the pool instead of being shed
+    hashes = await asyncio.gather(
+        *(
+            hash_password(body.password.get_secret_value(), shed=False)
+            for _, body in chunk
+        ),
+    )
+    records = [
+        (uuid4(), body.username, hashed, body.email, body.role.value)
+        for (_, body), hashed in zip(chunk, hashes, strict=True)
+    ]
+
+    await db_session.execute(
+        sa.text(
+            'CREATE TEMP TABLE accounts_import '
+            '(pid uuid, username text, encrypted_password text, email text, role text) '
+            'ON COMMIT DROP',
+        ),
+    )
+    connection = await (await db_session.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(
+        'accounts_import',
+        records=records,
+        columns=COLUMNS,
+    )
+    result = await db_session.execute(
+        sa.text(
+            'INSERT INTO accounts (pid, username, encrypted_password, email, role) '
+            'SELECT pid, username, encrypted_password, email, role::role '
+            'FROM accounts_import ON CONFLICT DO NOTHING '
+            'RETURNING pid, username, email, role',
+        ),
+    )
+    created = {row.username: row for row in result}
+
+    for line, body in chunk:
+        if body.username not in created:
+            report.errors.append(
+                ImportErrorSchema(line=line, detail='Username already exists'),
+            )
+    report.created += len(created)
+
+    return [CreateAccountData.model_validate(row) for row in created.values()]
+
+
+def validate_record(
+    line: int,
+    record: object,
+    report: ImportReportSchema,
+) -> PostSchema | None:
+    if isinstance(record, Exception):
+        report.errors.append(ImportErrorSchema(line=line, detail=str(record)))
+        return None
+
+    try:
+        return PostSchema.model_validate(record)
+    except ValidationError as e:
+        detail = '; '.join(
+            f'{".".join(map(str, error["loc"]))}: {error["msg"]}'
+            for error in e.errors()
+        )
+        report.errors.append(ImportErrorSchema(line=line, detail=detail))
+        return None
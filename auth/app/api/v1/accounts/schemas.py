@@ -14,6 +14,11 @@ class GetSchema(BaseModel):
     role: Role
 
 
+class PageSchema(BaseModel):
+    items: list[GetSchema]
+    next_cursor: int | None = None
+
+
 class PutSchema(BaseModel):
     email: EmailStr
     role: Role
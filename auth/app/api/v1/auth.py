@@ -2,8 +2,9 @@ from typing import Annotated, Any, cast
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from httpx import AsyncClient, HTTPError
+from httpx import HTTPError
 
+from app.http_client import http_client
 from app.settings import get_settings
 
 router = APIRouter()
@@ -12,16 +13,15 @@ router = APIRouter()
 @router.post('/auth')
 async def provide_auth(form: Annotated[OAuth2PasswordRequestForm, Depends()]) -> Any:
     try:
-        async with AsyncClient() as client:
-            response = await client.post(
-                str(get_settings().auth.TOKEN_URL),
-                data={
-                    'username': form.username,
-                    'password': form.password,
-                    'client_id': get_settings().auth.ID,
-                    'client_secret': get_settings().auth.SECRET,
-                },
-            )
+        response = await http_client.post(
+            str(get_settings().auth.TOKEN_URL),
+            data={
+                'username': form.username,
+                'password': form.password,
+                'client_id': get_settings().auth.ID,
+                'client_secret': get_settings().auth.SECRET,
+            },
+        )
     except HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
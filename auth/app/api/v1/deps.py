@@ -1,35 +1,35 @@
+from collections.abc import Awaitable, Callable
 from typing import Annotated
 
 import sqlalchemy as sa
-from fastapi import Depends, status
+from fastapi import Depends, Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.security.oauth2 import OAuth2PasswordBearer
-from httpx import AsyncClient
-from jose import jwt
+from jose import JWTError
 
+from app.api.srv.sso import decode_token
 from app.db import AsyncSession, get_session
 from app.models.entities import Account
 from app.models.enums import Role
-from app.settings import get_settings
+from app.versions import if_none_match, versions
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
 
+async def get_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
+    try:
+        return decode_token(token)
+    except JWTError as e:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED) from e
+
+
 async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    claims: Annotated[dict, Depends(get_claims)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
 ) -> Account:
-    async with AsyncClient() as client:
-        response = await client.post(
-            str(get_settings().auth.VERIFY_URL),
-            headers={'Authorization': f'Bearer {token}'},
-        )
-
-    if response.status_code == status.HTTP_401_UNAUTHORIZED:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
-
-    pid = jwt.get_unverified_claims(token).get('sub')
-    result = await db_session.execute(sa.select(Account).where(Account.pid == pid))
+    result = await db_session.execute(
+        sa.select(Account).where(Account.pid == claims['sub']),
+    )
     user = result.scalar()
 
     if not user:
@@ -39,3 +39,30 @@ async def get_current_user(
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
     return user
+
+
+def collection_etag(name: str) -> Callable[..., Awaitable[str | None]]:
+    '''Dependency answering 304 to a matching `If-None-Match`
+
+    Admins are recognized by the role claim, which is safe since tokens are
+    revoked on role changes, so a 304 needs no database. The dependency has
+    to be declared before the ones that query it.
+    '''
+
+    async def check(
+        request: Request,
+        claims: Annotated[dict, Depends(get_claims)],
+    ) -> str | None:
+        if claims.get('role') != Role.admin:
+            return None
+
+        etag = versions.etag(
+            name,
+            request.url.query,
+            request.headers.get('accept', ''),
+        )
+        if etag is not None and if_none_match(request, etag):
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return etag
+
+    return check
@@ -1,15 +1,22 @@
+from collections.abc import Callable
 from types import ModuleType
 from typing import cast
 
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from starlette.types import ASGIApp
 
 from app.settings import Settings
 
 
 class Application(FastAPI):
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        on_startup: list[Callable],
+        on_shutdown: list[Callable],
+    ) -> None:
         self.settings = settings
         super().__init__(
             title=settings.PROJECT_NAME,
@@ -20,11 +27,17 @@ class Application(FastAPI):
             docs_url='/srv/docs',
             redoc_url='/srv/redoc',
             swagger_ui_oauth2_redirect_url='/srv/docs/oauth2-redirect',
+            on_startup=on_startup,
+            on_shutdown=on_shutdown,
         )
 
     def build_middleware_stack(self) -> ASGIApp:
-        return CORSMiddleware(
+        app = GZipMiddleware(
             app=super().build_middleware_stack(),
+            minimum_size=self.settings.GZIP_MINIMUM_SIZE,
+        )
+        return CORSMiddleware(
+            app=app,
             allow_credentials=True,
             allow_methods=['*'],
             allow_headers=['*'],
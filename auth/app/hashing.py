@@ -0,0 +1,124 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.settings import get_settings
+
+pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+R = TypeVar('R')
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail='Сервис перегружен, повторите попытку позже',
+        headers={'Retry-After': '1'},
+    )
+
+
+class HashingExecutor:
+    '''Process pool for bcrypt work with a bounded submission queue
+
+    At most `queue_size` operations are submitted to the pool at once and
+    at most `queue_size` more wait for a slot on the event loop. Work past
+    that is shed with a 503 instead of queueing without limit. Bulk work is
+    never shed, it takes at most half of the workers and does not count
+    towards the waiting limit, so it cannot push logins over it.
+    '''
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self._slots = asyncio.Semaphore(queue_size)
+        self._waiting = 0
+        self._bulk = asyncio.Semaphore(max(workers // 2, 1))
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process that runs the producer threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('forkserver'),
+            )
+        return self._pool
+
+    async def start(self) -> None:
+        # Spawn workers before the first request instead of during it
+        await asyncio.gather(
+            *(self._submit(_ping) for _ in range(self.workers)),
+        )
+
+    async def stop(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            # Waits for running jobs, keep it off the event loop
+            await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., R], *args: str, shed: bool = True) -> R:
+        '''Run `fn` in the pool, shedding it if the queue is full
+
+        Bulk callers pass `shed=False` to wait for their share of the pool.
+        '''
+
+        if not shed:
+            async with self._bulk:
+                return await self._submit(fn, *args)
+
+        if self._slots.locked() and self._waiting >= self.queue_size:
+            raise _overloaded()
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            return await self._execute(fn, *args)
+        finally:
+            self._slots.release()
+
+    async def _submit(self, fn: Callable[..., R], *args: str) -> R:
+        async with self._slots:
+            return await self._execute(fn, *args)
+
+    async def _execute(self, fn: Callable[..., R], *args: str) -> R:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool,
+            fn,
+            *args,
+        )
+
+
+hasher = HashingExecutor(
+    workers=get_settings().hashing.WORKERS or os.cpu_count() or 1,
+    queue_size=get_settings().hashing.QUEUE_SIZE,
+)
+
+
+async def hash_password(password: str, *, shed: bool = True) -> str:
+    return await hasher.run(_hash, password, shed=shed)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await hasher.run(_verify, password, hashed)
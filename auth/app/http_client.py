@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from typing import Any
+
+from httpx import (
+    AsyncClient,
+    AsyncHTTPTransport,
+    ConnectError,
+    ConnectTimeout,
+    Limits,
+    PoolTimeout,
+    Response,
+    Timeout,
+    TransportError,
+)
+
+from app.settings import HTTPSettings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Never sent, so safe to retry whatever the method
+UNSENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class RetryBudget:
+    '''Retries allowed as a share of requests
+
+    Every request deposits `ratio` of a retry and every retry withdraws a
+    whole one, up to `burst` at once. When a dependency is down, retries
+    add at most `ratio` to the load instead of multiplying it.
+    '''
+
+    def __init__(self, ratio: float, burst: int = 10) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.balance = float(burst)
+
+    def deposit(self) -> None:
+        self.balance = min(self.balance + self.ratio, self.burst)
+
+    def withdraw(self) -> bool:
+        if self.balance < 1:
+            return False
+
+        self.balance -= 1
+        return True
+
+
+class HTTPClient:
+    '''Process-wide pooled client for calls to other services
+
+    Connections are kept alive and reused between requests. Failed requests
+    are retried when that is safe, within a retry budget.
+    '''
+
+    def __init__(self, settings: HTTPSettings) -> None:
+        self.settings = settings
+        self.budget = RetryBudget(settings.RETRY_BUDGET)
+        self.requests = 0
+        self.in_flight = 0
+        self.retried = 0
+        self.failed = 0
+        self._transport: AsyncHTTPTransport | None = None
+        self._client: AsyncClient | None = None
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        timeout: float | Timeout | None = None,
+        **kwargs: Any,
+    ) -> Response:
+        '''Send a request, `timeout` overrides the client-wide one'''
+
+        if self._client is None:
+            raise RuntimeError('HTTP client is not started')
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+
+        self.requests += 1
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            self.in_flight += 1
+            try:
+                return await self._client.request(method, url, **kwargs)
+            except TransportError as e:
+                retryable = isinstance(e, UNSENT_ERRORS) or method in IDEMPOTENT_METHODS
+                if (
+                    not retryable
+                    or attempt >= self.settings.RETRIES
+                    or not self.budget.withdraw()
+                ):
+                    self.failed += 1
+                    raise
+                logger.warning('Retrying %s %s: %r', method, url, e)
+            finally:
+                self.in_flight -= 1
+
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(self.settings.RETRY_BACKOFF.total_seconds() * attempt)
+
+    async def get(self, url: str, **kwargs: Any) -> Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> Response:
+        return await self.request('POST', url, **kwargs)
+
+    def stats(self) -> dict[str, int | float]:
+        connections = (
+            self._transport._pool.connections if self._transport else []  # noqa: SLF001
+        )
+        return {
+            'connections': len(connections),
+            'idle_connections': sum(connection.is_idle() for connection in connections),
+            'max_connections': self.settings.MAX_CONNECTIONS,
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'retried': self.retried,
+            'failed': self.failed,
+            'retry_budget': round(self.budget.balance, 2),
+        }
+
+    async def start(self) -> None:
+        settings = self.settings
+        self._transport = AsyncHTTPTransport(
+            http2=settings.HTTP2,
+            limits=Limits(
+                max_connections=settings.MAX_CONNECTIONS,
+                max_keepalive_connections=settings.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.KEEPALIVE_EXPIRY.total_seconds(),
+            ),
+        )
+        self._client = AsyncClient(
+            transport=self._transport,
+            timeout=Timeout(
+                settings.TIMEOUT.total_seconds(),
+                connect=settings.CONNECT_TIMEOUT.total_seconds(),
+                pool=settings.POOL_TIMEOUT.total_seconds(),
+            ),
+        )
+
+    async def stop(self) -> None:
+        if self._client:
+            await self._client.aclose()
+
+
+http_client = HTTPClient(get_settings().http)
@@ -1,7 +1,112 @@
-from confluent_kafka import Producer
+import asyncio
+import logging
+import threading
+
+from confluent_kafka import KafkaError, KafkaException, Message, Producer
 
 from app.settings import get_settings
 
+logger = logging.getLogger(__name__)
+
+FLUSH_TIMEOUT = 10
+
+# Lets consumers route a message without decoding its value
+EVENT_HEADER = 'event-name'
+
+
+class AsyncProducer:
+    '''Process-wide producer whose deliveries resolve asyncio futures
+
+    Delivery reports are served by a background poll thread, so producing
+    never blocks the event loop. Failed deliveries are logged even when
+    nobody awaits them.
+    '''
+
+    def __init__(self) -> None:
+        self._producer: Producer | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def produce(
+        self,
+        topic: str,
+        value: str | bytes,
+        key: str | bytes | None = None,
+        headers: dict[str, str | bytes] | None = None,
+    ) -> asyncio.Future[Message]:
+        if self._producer is None or self._loop is None:
+            raise RuntimeError('Producer is not started')
+
+        loop = self._loop
+        future: asyncio.Future[Message] = loop.create_future()
+        future.add_done_callback(_log_failure)
+
+        def on_delivery(err: KafkaError | None, msg: Message) -> None:
+            loop.call_soon_threadsafe(_resolve, future, err, msg)
+
+        self._producer.produce(
+            topic,
+            value,
+            key,
+            headers=headers,
+            on_delivery=on_delivery,
+        )
+        return future
+
+    def _poll(self) -> None:
+        while not self._stopped.is_set():
+            self._producer.poll(0.1)  # type: ignore[union-attr]
+
+    async def start(self) -> None:
+        settings = get_settings().kafka
+        self._loop = asyncio.get_running_loop()
+        self._producer = Producer(
+            {
+                'bootstrap.servers': settings.URI,
+                'linger.ms': settings.LINGER_MS,
+                'batch.size': settings.BATCH_SIZE,
+                'compression.type': settings.COMPRESSION,
+                'acks': settings.ACKS,
+                # Retries must not reorder messages of a key
+                'enable.idempotence': settings.ACKS == 'all',
+            },
+        )
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._producer is None:
+            return
+
+        self._stopped.set()
+        if self._thread is not None:
+            # The poll thread must be done with the producer before it is dropped
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        remaining = await asyncio.to_thread(self._producer.flush, FLUSH_TIMEOUT)
+        if remaining:
+            logger.error('%d messages were not delivered before shutdown', remaining)
+        self._producer = None
+
+
+def _resolve(
+    future: asyncio.Future[Message],
+    err: KafkaError | None,
+    msg: Message,
+) -> None:
+    if future.done():
+        return
+    if err is not None:
+        future.set_exception(KafkaException(err))
+    else:
+        future.set_result(msg)
+
+
+def _log_failure(future: asyncio.Future[Message]) -> None:
+    if not future.cancelled() and (e := future.exception()):
+        logger.error('Failed to deliver a message: %s', e)
+
 
-def get_producer() -> Producer:
-    return Producer({'bootstrap.servers': get_settings().kafka.URI})
+producer = AsyncProducer()
@@ -0,0 +1,57 @@
+import json
+from base64 import urlsafe_b64encode
+from functools import cache
+from hashlib import sha256
+from typing import Any
+
+from jose import jwk
+from jose.backends.base import Key
+
+from app.settings import get_settings
+
+
+def thumbprint(public_jwk: dict[str, Any]) -> str:
+    '''RFC 7638 JWK thumbprint, used as `kid`'''
+
+    members = {name: public_jwk[name] for name in ('e', 'kty', 'n')}
+    digest = sha256(json.dumps(members, separators=(',', ':')).encode()).digest()
+    return urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+class SigningKey:
+    '''Private key used to sign access tokens and its public counterpart'''
+
+    def __init__(self, private_pem: str, algorithm: str) -> None:
+        self.algorithm = algorithm
+        self.private_key: Key = jwk.construct(private_pem, algorithm)
+        self.public_key: Key = self.private_key.public_key()
+        self.kid = thumbprint(self.public_key.to_dict())
+
+    def to_jwk(self) -> dict[str, Any]:
+        return {**self.public_key.to_dict(), 'kid': self.kid, 'use': 'sig'}
+
+
+@cache
+def get_signing_key() -> SigningKey:
+    settings = get_settings().jwt
+    return SigningKey(settings.PRIVATE_KEY.get_secret_value(), settings.ALGORITHM)
+
+
+@cache
+def get_verification_keys() -> dict[str, SigningKey]:
+    '''Keys tokens may be signed with by `kid`, the previous one included'''
+
+    settings = get_settings().jwt
+    keys = [get_signing_key()]
+    if settings.PREVIOUS_PRIVATE_KEY is not None:
+        keys.append(
+            SigningKey(
+                settings.PREVIOUS_PRIVATE_KEY.get_secret_value(),
+                settings.ALGORITHM,
+            ),
+        )
+    return {key.kid: key for key in keys}
+
+
+def get_jwks() -> dict[str, list[dict[str, Any]]]:
+    return {'keys': [key.to_jwk() for key in get_verification_keys().values()]}
@@ -1,14 +1,20 @@
+from datetime import datetime
 from uuid import UUID, uuid4
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .enums import Role
-from .mixins import Base, InternalEntityMixin, TimestampMixin
+from .mixins import Base, IDMixin, InternalEntityMixin, TimestampMixin
 
 
 class Account(InternalEntityMixin, TimestampMixin):
     __tablename__ = 'accounts'
+    __table_args__ = (
+        sa.Index('ix_accounts_role_id', 'role', 'id'),
+        sa.Index('ix_accounts_created_at', 'created_at'),
+        sa.Index('ix_accounts_updated_at', 'updated_at'),
+    )
 
     username: Mapped[str] = mapped_column(unique=True)
     encrypted_password: Mapped[str] = mapped_column()
@@ -32,3 +38,38 @@ class AuthorizedService(Base):
         sa.UUID(as_uuid=True),
         unique=True,
     )
+
+
+class RefreshToken(IDMixin, TimestampMixin):
+    __tablename__ = 'refresh_tokens'
+
+    token_hash: Mapped[str] = mapped_column(unique=True)
+    account_pid: Mapped[UUID] = mapped_column(
+        sa.ForeignKey('accounts.pid', ondelete='CASCADE'),
+        index=True,
+    )
+    family: Mapped[UUID] = mapped_column(sa.UUID(as_uuid=True), index=True)
+    expires_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True))
+    used: Mapped[bool] = mapped_column(default=False)
+
+
+class OutboxMessage(Base):
+    '''Event waiting to be published by the relay'''
+
+    __tablename__ = 'outbox'
+
+    id_: Mapped[int] = mapped_column('id', sa.BigInteger, primary_key=True)
+    topic: Mapped[str] = mapped_column()
+    key: Mapped[str | None] = mapped_column(index=True)
+    name: Mapped[str] = mapped_column()
+    value: Mapped[str] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(server_default=sa.func.now())
+
+
+class CollectionVersion(Base):
+    '''Version of a collection, incremented by every write to it'''
+
+    __tablename__ = 'collection_versions'
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(sa.BigInteger)
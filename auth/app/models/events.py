@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 from typing import Generic, TypeVar
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
@@ -8,7 +8,11 @@ from app.models.enums import Role
 
 
 class EventMeta(BaseModel):
-    created_at: int = Field(default_factory=lambda: datetime.now(UTC).timestamp())
+    # Unique per event, lets consumers drop redeliveries and replays
+    event_id: UUID = Field(default_factory=uuid4)
+    created_at: int = Field(
+        default_factory=lambda: int(datetime.now(UTC).timestamp()),
+    )
     name: str
 
 
@@ -48,3 +52,14 @@ class UpdateAccountData(BaseModel):
 
 class UpdateAccountCUD(BaseEvent[UpdateAccountData]):
     '''CUD Event produced on account editing'''
+
+
+class RevokedTokensData(BaseModel):
+    pid: UUID
+    issued_before: float
+    # When every revoked token has expired, None from older producers
+    expires_before: float | None = None
+
+
+class RevokedTokensBE(BaseEvent[RevokedTokensData]):
+    '''BE Event produced when access tokens of an account are revoked'''
@@ -0,0 +1,24 @@
+from app.db import AsyncSession
+from app.models.entities import OutboxMessage
+from app.models.events import BaseEvent
+
+
+def event_key(event: BaseEvent) -> str | None:
+    '''Partitioning key, the pid of the entity the event is about'''
+
+    pid = getattr(event.data, 'pid', None)
+    return str(pid) if pid is not None else None
+
+
+def publish(db_session: AsyncSession, topic: str, *events: BaseEvent) -> None:
+    '''Queue events for the relay, they are sent only if the transaction commits'''
+
+    db_session.add_all(
+        OutboxMessage(
+            topic=topic,
+            key=event_key(event),
+            name=event.meta.name,
+            value=event.model_dump_json(),
+        )
+        for event in events
+    )
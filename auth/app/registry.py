@@ -0,0 +1,136 @@
+import asyncio
+import hmac
+import logging
+from typing import Any
+from uuid import UUID
+
+import asyncpg
+import sqlalchemy as sa
+
+from app.db import AsyncSession, engine, maker
+from app.models.entities import AuthorizedService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'authorized_services'
+RECONNECT_DELAY = 5
+
+_MISSING = UUID(int=0)
+
+
+async def notify_changed(db_session: AsyncSession) -> None:
+    '''Invalidate registries of all workers once the transaction commits'''
+
+    await db_session.execute(sa.select(sa.func.pg_notify(CHANNEL, '')))
+
+
+class ServiceRegistry:
+    '''In-memory copy of `authorized_services`
+
+    The copy is trusted only while the LISTEN connection is alive; any
+    NOTIFY on `CHANNEL` drops it and the next lookup reloads the table.
+    Without a listener every lookup falls back to the database.
+    '''
+
+    def __init__(self) -> None:
+        self._secrets: dict[UUID, UUID] | None = None
+        self._generation = 0
+        self._loading: asyncio.Task[dict[UUID, UUID]] | None = None
+        self._listening = False
+        self._task: asyncio.Task[None] | None = None
+
+    def invalidate(self, *_: Any) -> None:
+        self._secrets = None
+        self._loading = None
+        self._generation += 1
+
+    async def get(self, client_id: str, client_secret: str) -> AuthorizedService | None:
+        try:
+            id_, secret = UUID(client_id), UUID(client_secret)
+        except ValueError:
+            return None
+
+        secrets = await self._get_secrets() if self._listening else None
+        if secrets is None:
+            expected = await self._fetch_secret(id_)
+        else:
+            expected = secrets.get(id_)
+
+        # Compare against a dummy secret too, so unknown ids take as long
+        matches = hmac.compare_digest((expected or _MISSING).bytes, secret.bytes)
+        if expected is None or not matches:
+            return None
+
+        return AuthorizedService(id_=id_, secret=expected)
+
+    async def _get_secrets(self) -> dict[UUID, UUID]:
+        if self._secrets is not None:
+            return self._secrets
+
+        generation = self._generation
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+            self._loading.add_done_callback(self._on_loaded)
+        secrets = await asyncio.shield(self._loading)
+        # Drop the result if the table changed while it was loading
+        if self._listening and generation == self._generation:
+            self._secrets = secrets
+        return secrets
+
+    def _on_loaded(self, loading: asyncio.Task[dict[UUID, UUID]]) -> None:
+        # A failed load is not cached, the next lookup starts a new one
+        if self._loading is loading and (loading.cancelled() or loading.exception()):
+            self._loading = None
+
+    async def _load(self) -> dict[UUID, UUID]:
+        async with maker() as session:
+            result = await session.execute(
+                sa.select(AuthorizedService.id_, AuthorizedService.secret),
+            )
+            return dict(result.tuples().all())
+
+    async def _fetch_secret(self, id_: UUID) -> UUID | None:
+        async with maker() as session:
+            result = await session.execute(
+                sa.select(AuthorizedService.secret).where(
+                    AuthorizedService.id_ == id_,
+                ),
+            )
+            return result.scalar()
+
+    async def _listen(self) -> None:
+        dsn = engine.url.set(drivername='postgresql').render_as_string(
+            hide_password=False,
+        )
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except (OSError, asyncpg.PostgresError):
+                logger.exception('Failed to connect the registry listener')
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            terminated = asyncio.Event()
+            connection.add_termination_listener(lambda _, event=terminated: event.set())
+            try:
+                await connection.add_listener(CHANNEL, self.invalidate)
+                # Notifications may have been missed while disconnected
+                self.invalidate()
+                self._listening = True
+                await terminated.wait()
+            finally:
+                self._listening = False
+                self.invalidate()
+                await connection.close()
+
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+registry = ServiceRegistry()
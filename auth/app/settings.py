@@ -1,14 +1,17 @@
 from datetime import timedelta
 from functools import cache
 from ipaddress import IPv4Address
-from typing import Any, cast
+from typing import Any, Literal, cast
 
 from dotenv import find_dotenv
 from pydantic import (
     HttpUrl,
     KafkaDsn,
+    NonNegativeFloat,
+    NonNegativeInt,
     PositiveInt,
     PostgresDsn,
+    RedisDsn,
     SecretStr,
     validator,
 )
@@ -63,6 +66,10 @@ class KafkaSettings(EnvSettings):
     USER: str | None = None
     PASSWORD: SecretStr | None = None
     URI: KafkaDsn | None = None
+    COMPRESSION: Literal['none', 'gzip', 'snappy', 'lz4', 'zstd'] = 'zstd'
+    LINGER_MS: NonNegativeInt = 5
+    BATCH_SIZE: PositiveInt = 1_000_000
+    ACKS: Literal['0', '1', 'all'] = 'all'
 
     @validator('URI')
     def assemble_uri(
@@ -76,7 +83,7 @@ class KafkaSettings(EnvSettings):
         result = values['HOST']
         if values.get('PORT'):
             result += ':' + str(values['PORT'])
-        
+
         return result
 
 
@@ -108,10 +115,38 @@ class SchemeRegistrySettings(EnvSettings):
 
 
 class JWTSettings(EnvSettings):
+    '''Access token signing settings'''
+
     model_config = SettingsConfigDict(env_prefix='JWT_')
 
-    LIFETIME: timedelta = timedelta(days=30)
-    SECRET: str
+    LIFETIME: timedelta = timedelta(minutes=15)
+    REFRESH_LIFETIME: timedelta = timedelta(days=30)
+    PRIVATE_KEY: SecretStr  # PEM encoded RSA key
+    # The key PRIVATE_KEY replaced, still published until its tokens expire
+    PREVIOUS_PRIVATE_KEY: SecretStr | None = None
+    ALGORITHM: str = 'RS256'
+    JWKS_MAX_AGE: timedelta = timedelta(minutes=5)
+
+
+class HashingSettings(EnvSettings):
+    '''Password hashing executor settings'''
+
+    model_config = SettingsConfigDict(env_prefix='HASHING_')
+
+    WORKERS: PositiveInt | None = None  # defaults to the number of cores
+    QUEUE_SIZE: PositiveInt = 64
+
+
+class ThrottleSettings(EnvSettings):
+    '''Login admission control settings'''
+
+    model_config = SettingsConfigDict(env_prefix='THROTTLE_')
+
+    WINDOW: timedelta = timedelta(minutes=1)
+    USERNAME_LIMIT: PositiveInt = 10
+    CLIENT_LIMIT: PositiveInt = 100
+    MAX_CONCURRENT_HASHES: PositiveInt | None = None  # defaults to HASHING_QUEUE_SIZE
+    REDIS_URI: RedisDsn | None = None  # shares counters between workers
 
 
 class AuthSettings(EnvSettings):
@@ -120,7 +155,33 @@ class AuthSettings(EnvSettings):
     ID: str
     SECRET: str
     TOKEN_URL: HttpUrl = HttpUrl('http://localhost:5555/srv/token')
-    VERIFY_URL: HttpUrl = HttpUrl('http://localhost:5555/srv/verify')
+
+
+class HTTPSettings(EnvSettings):
+    '''Pooled client for calls to other services'''
+
+    model_config = SettingsConfigDict(env_prefix='HTTP_')
+
+    MAX_CONNECTIONS: PositiveInt = 100
+    MAX_KEEPALIVE_CONNECTIONS: PositiveInt = 20
+    KEEPALIVE_EXPIRY: timedelta = timedelta(seconds=30)
+    HTTP2: bool = False  # needs the `h2` package, `httpx[http2]`
+    TIMEOUT: timedelta = timedelta(seconds=5)
+    CONNECT_TIMEOUT: timedelta = timedelta(seconds=2)
+    POOL_TIMEOUT: timedelta = timedelta(seconds=1)
+    RETRIES: NonNegativeInt = 2
+    RETRY_BACKOFF: timedelta = timedelta(milliseconds=100)
+    RETRY_BUDGET: NonNegativeFloat = 0.1  # retries per request
+
+
+class OutboxSettings(EnvSettings):
+    '''Outbox relay settings'''
+
+    model_config = SettingsConfigDict(env_prefix='OUTBOX_')
+
+    RELAY: bool = True  # run a relay inside every app process
+    BATCH_SIZE: PositiveInt = 1000
+    POLL_INTERVAL: timedelta = timedelta(milliseconds=500)
 
 
 class Settings(EnvSettings):
@@ -131,6 +192,7 @@ class Settings(EnvSettings):
     VERSION: str = '0.1.0'
 
     ORIGIN_REGEX: str = '.*'
+    GZIP_MINIMUM_SIZE: PositiveInt = 1000
 
     HOST: IPv4Address = IPv4Address('0.0.0.0')  # noqa: S104
     PORT: PositiveInt
@@ -138,8 +200,12 @@ class Settings(EnvSettings):
 
     auth: AuthSettings = AuthSettings()
     jwt: JWTSettings = JWTSettings()
+    hashing: HashingSettings = HashingSettings()
+    throttle: ThrottleSettings = ThrottleSettings()
     db: PostgresSettings = PostgresSettings()
+    http: HTTPSettings = HTTPSettings()
     kafka: KafkaSettings = KafkaSettings()
+    outbox: OutboxSettings = OutboxSettings()
     scheme_registry: SchemeRegistrySettings = SchemeRegistrySettings()
 
 
@@ -0,0 +1,135 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated, Protocol
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.settings import get_settings
+
+MAX_TRACKED_KEYS = 100_000
+
+
+def _retry_after(
+    previous: int,
+    current: int,
+    elapsed: float,
+    window: float,
+    limit: int,
+) -> float:
+    '''Seconds until the sliding window estimate drops below the limit'''
+
+    if current >= limit:
+        return window - elapsed + window * (1 - limit / current)
+    return window * (1 - (limit - current) / previous) - elapsed
+
+
+class Backend(Protocol):
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        '''Count a hit, return 0 if allowed or seconds to wait otherwise'''
+
+
+class MemoryBackend:
+    '''Sliding window counters of this process'''
+
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS) -> None:
+        self.max_keys = max_keys
+        # key -> (window index, previous window hits, current window hits)
+        self._counters: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        index, elapsed = divmod(now, window)
+        stored, previous, current = self._counters.pop(key, (int(index), 0, 0))
+        if stored != index:
+            previous = current if stored == index - 1 else 0
+            current = 0
+
+        if previous * (1 - elapsed / window) + current >= limit:
+            self._counters[key] = (int(index), previous, current)
+            return _retry_after(previous, current, elapsed, window, limit)
+
+        self._counters[key] = (int(index), previous, current + 1)
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+        return 0
+
+
+class RedisBackend:
+    '''Sliding window counters shared by all workers through Redis'''
+
+    def __init__(self, uri: str) -> None:
+        from redis.asyncio import Redis  # optional dependency
+
+        self.redis = Redis.from_url(uri)
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        index, elapsed = divmod(now, window)
+        current_key, previous_key = f'{key}:{int(index)}', f'{key}:{int(index) - 1}'
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, math.ceil(window * 2))
+            pipe.get(previous_key)
+            current, _, previous = await pipe.execute()
+
+        current, previous = int(current) - 1, int(previous or 0)
+        if previous * (1 - elapsed / window) + current >= limit:
+            await self.redis.decr(current_key)
+            return _retry_after(previous, current, elapsed, window, limit)
+        return 0
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        detail='Слишком много попыток входа',
+        headers={'Retry-After': str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class LoginThrottle:
+    '''Admission control in front of bcrypt-heavy login requests'''
+
+    def __init__(self) -> None:
+        self.settings = get_settings().throttle
+        self.backend: Backend = (
+            RedisBackend(str(self.settings.REDIS_URI))
+            if self.settings.REDIS_URI
+            else MemoryBackend()
+        )
+        self.hash_slots = asyncio.Semaphore(
+            self.settings.MAX_CONCURRENT_HASHES or get_settings().hashing.QUEUE_SIZE,
+        )
+
+    async def __call__(
+        self,
+        request: Request,
+        form: Annotated[OAuth2PasswordRequestForm, Depends()],
+    ) -> None:
+        window = self.settings.WINDOW.total_seconds()
+        client = request.client.host if request.client else 'unknown'
+        for key, limit in (
+            (f'login:username:{form.username}', self.settings.USERNAME_LIMIT),
+            (f'login:client:{client}', self.settings.CLIENT_LIMIT),
+        ):
+            if retry_after := await self.backend.hit(key, limit, window):
+                raise _too_many_requests(retry_after)
+
+    @asynccontextmanager
+    async def hashing(self) -> AsyncIterator[None]:
+        '''Reject instead of queueing when all hash slots are taken'''
+
+        if self.hash_slots.locked():
+            raise _too_many_requests(1)
+
+        async with self.hash_slots:
+            yield
+
+
+login_throttle = LoginThrottle()
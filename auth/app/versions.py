@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import logging
+
+import sqlalchemy as sa
+from asyncpg import Connection, InterfaceError, PostgresError
+from fastapi import Request
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import AsyncSession, engine
+from app.models.entities import CollectionVersion
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'collection_versions'
+CHECK_INTERVAL = 10
+RECONNECT_DELAY = 5
+
+
+class CollectionVersions:
+    '''Versions of collections, bumped by writes through LISTEN/NOTIFY
+
+    Writers increment the `collection_versions` row of the collection in
+    their transaction with `bump`, and queue a notification carrying the
+    new version, which Postgres delivers to every process once it commits.
+    All processes see the same versions and issue the same ETags. ETags are
+    only issued while the listener is connected, and the versions are
+    reloaded whenever it connects, so no missed notification is served.
+    '''
+
+    def __init__(self) -> None:
+        self.connected = False
+        self._versions: dict[str, int] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    async def bump(self, db_session: AsyncSession, name: str) -> None:
+        # The row stays locked until commit, so versions commit in order
+        statement = postgresql.insert(CollectionVersion).values(name=name, version=1)
+        version = await db_session.scalar(
+            statement.on_conflict_do_update(
+                index_elements=[CollectionVersion.name],
+                set_={'version': CollectionVersion.version + 1},
+            ).returning(CollectionVersion.version),
+        )
+        await db_session.execute(
+            sa.select(sa.func.pg_notify(CHANNEL, f'{name}:{version}')),
+        )
+
+    def etag(self, name: str, *parts: object) -> str | None:
+        '''Weak ETag of the collection as seen with `parts`, like the query'''
+
+        if not self.connected:
+            return None
+
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (name, self._versions.get(name, 0), *parts):
+            digest.update(str(part).encode() + b'\0')
+        return f'W/"{digest.hexdigest()}"'
+
+    def _update(self, name: str, version: int) -> None:
+        # Notifications of concurrent commits may arrive out of order
+        self._versions[name] = max(self._versions.get(name, 0), version)
+
+    def _on_notify(self, _: Connection, __: int, ___: str, payload: str) -> None:
+        name, _, version = payload.rpartition(':')
+        self._update(name, int(version))
+
+    async def _listen(self) -> None:
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            try:
+                await raw.driver_connection.add_listener(CHANNEL, self._on_notify)
+                # Listening first, so no bump falls between the two
+                result = await conn.execute(
+                    sa.select(CollectionVersion.name, CollectionVersion.version),
+                )
+                for name, version in result.tuples().all():
+                    self._update(name, version)
+                # Notifications are held back while a transaction is open
+                await conn.commit()
+                self.connected = True
+                while True:
+                    await asyncio.sleep(CHECK_INTERVAL)
+                    await conn.execute(sa.select(1))
+                    await conn.commit()
+            finally:
+                self.connected = False
+                # Never hand a listening connection back to the pool
+                await conn.invalidate()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except (OSError, SQLAlchemyError, PostgresError, InterfaceError):
+                logger.exception('Collection versions listener disconnected')
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match', '')
+    return any(tag.strip() in {etag, '*'} for tag in header.split(','))
+
+
+versions = CollectionVersions()
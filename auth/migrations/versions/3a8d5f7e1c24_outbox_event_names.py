@@ -0,0 +1,30 @@
+'''outbox event names
+
+Revision ID: 3a8d5f7e1c24
+Revises: b71e3d0f4a92
+Create Date: 2026-10-18 19:48:27.330571
+
+'''
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8d5f7e1c24'
+down_revision: str | None = 'b71e3d0f4a92'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Rows queued before the upgrade get an empty name, routed by a meta parse
+    op.add_column(
+        'outbox',
+        sa.Column('name', sa.String(), server_default='', nullable=False),
+    )
+    op.alter_column('outbox', 'name', server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column('outbox', 'name')
@@ -0,0 +1,86 @@
+'''Login throughput under concurrency: inline bcrypt vs hashing executor
+
+Run inside the service environment (settings are read from `.env`):
+
+    poetry run bench-hashing --requests 200 --concurrency 32
+'''
+import argparse
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from app.hashing import HashingExecutor, _verify, pwd_context
+
+PASSWORD = 'correct horse battery staple'  # noqa: S105
+TICK = 0.01
+
+
+async def _watch_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    '''Emulate a cheap endpoint sharing the worker with logins'''
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+async def _measure(
+    login: Callable[[], Awaitable[bool]],
+    requests: int,
+    concurrency: int,
+) -> tuple[float, float, float]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def request() -> None:
+        async with slots:
+            await login()
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_loop_lag(lags, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await watcher
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    return requests / elapsed, p99 * 1000, (lags[-1] if lags else 0.0) * 1000
+
+
+async def _bench(requests: int, concurrency: int, workers: int) -> None:
+    hashed = pwd_context.hash(PASSWORD)
+
+    async def inline() -> bool:
+        return pwd_context.verify(PASSWORD, hashed)
+
+    executor = HashingExecutor(workers=workers, queue_size=workers * 4)
+    await executor.start()
+
+    async def offloaded() -> bool:
+        return await executor.run(_verify, PASSWORD, hashed)
+
+    print(f'{requests} logins, concurrency {concurrency}, {workers} workers\n')
+    print(f'{"mode":<10}{"logins/s":>12}{"lag p99, ms":>14}{"lag max, ms":>14}')
+    for name, login in (('inline', inline), ('executor', offloaded)):
+        rps, p99, worst = await _measure(login, requests, concurrency)
+        print(f'{name:<10}{rps:>12.1f}{p99:>14.1f}{worst:>14.1f}')
+
+    await executor.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    asyncio.run(_bench(args.requests, args.concurrency, args.workers))
+
+
+if __name__ == '__main__':
+    main()
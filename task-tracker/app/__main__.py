@@ -2,10 +2,39 @@ import uvicorn
 
 from app import api
 from app.application import Application
-from app.consumer import start_consumer
+from app.assignees import assignees
+from app.consumer import accounts_consumer
+from app.http_client import http_client
+from app.jwks import key_set
+from app.kafka import producer
+from app.relay import relay
+from app.revocation import revocation_listener
 from app.settings import get_settings
+from app.versions import versions
 
-app = Application(get_settings(), [start_consumer])
+app = Application(
+    get_settings(),
+    on_startup=[
+        producer.start,
+        http_client.start,
+        key_set.start,
+        revocation_listener.start,
+        assignees.start,
+        accounts_consumer.start,
+        versions.start,
+        relay.start,
+    ],
+    on_shutdown=[
+        relay.stop,
+        versions.stop,
+        accounts_consumer.stop,
+        assignees.stop,
+        revocation_listener.stop,
+        key_set.stop,
+        http_client.stop,
+        producer.stop,
+    ],
+)
 app.register_endpoints(api)
 
 if __name__ == '__main__':
@@ -1,37 +1,87 @@
+from collections.abc import Awaitable, Callable
 from typing import Annotated
+from uuid import UUID
 
 import sqlalchemy as sa
-from fastapi import Depends, status
+from fastapi import Depends, Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.security.oauth2 import OAuth2PasswordBearer
-from httpx import AsyncClient
-from jose import jwt
+from jose import JWTError
 
 from app.db import AsyncSession, get_session
+from app.jwks import key_set
 from app.models.entities import Account
+from app.revocation import revocations
 from app.settings import get_settings
+from app.verification import TokenCache, VerifiedToken
+from app.versions import if_none_match, versions
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
+token_cache = TokenCache(
+    maxsize=get_settings().auth.CACHE_SIZE,
+    ttl=get_settings().auth.CACHE_TTL,
+)
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db_session: Annotated[AsyncSession, Depends(get_session)],
-) -> Account:
-    async with AsyncClient() as client:
-        response = await client.post(
-            str(get_settings().auth.VERIFY_URL),
-            headers={'Authorization': f'Bearer {token}'},
-        )
 
-    if response.status_code == status.HTTP_401_UNAUTHORIZED:
+async def verify_token(token: str) -> VerifiedToken:
+    try:
+        claims = await key_set.decode(token)
+    except JWTError as e:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED) from e
+
+    return VerifiedToken(
+        pid=UUID(claims['sub']),
+        issued_at=float(claims.get('iat', 0)),
+        expires_at=float(claims['exp']),
+    )
+
+
+async def get_verified_token(
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> VerifiedToken:
+    verified = await token_cache.get(token, verify_token)
+    # Checked on every request, cached verifications included
+    if revocations.is_revoked(verified.pid, verified.issued_at):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    pid = jwt.get_unverified_claims(token).get('sub')
-    result = await db_session.execute(sa.select(Account).where(Account.pid == pid))
+    return verified
+
+
+async def get_current_user(
+    verified: Annotated[VerifiedToken, Depends(get_verified_token)],
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+) -> Account:
+    result = await db_session.execute(
+        sa.select(Account).where(Account.pid == verified.pid, ~Account.deleted),
+    )
     user = result.scalar()
 
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
     return user
+
+
+def collection_etag(name: str) -> Callable[..., Awaitable[str | None]]:
+    '''Dependency answering 304 to a matching `If-None-Match`
+
+    It needs a verified token but no database, so it has to be declared
+    before the dependencies that query it.
+    '''
+
+    async def check(
+        request: Request,
+        verified: Annotated[VerifiedToken, Depends(get_verified_token)],
+    ) -> str | None:
+        etag = versions.etag(
+            name,
+            verified.pid,
+            request.url.query,
+            request.headers.get('accept', ''),
+        )
+        if etag is not None and if_none_match(request, etag):
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return etag
+
+    return check
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.api.deps import token_cache
+from app.http_client import http_client
+
+router = APIRouter()
+
+
+@router.get('/')
+async def get_metrics() -> dict[str, dict[str, int | float]]:
+    return {'http': http_client.stats(), 'token_cache': token_cache.stats()}
@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
 from .auth import router as auth_router
+from .metrics import router as metrics_router
 from .tasks import router as task_router
 
 router = APIRouter()
 router.include_router(auth_router, prefix='/auth')
 router.include_router(task_router, prefix='/tasks')
+# Service-only, under /srv like in auth
+router.include_router(metrics_router, prefix='/srv/metrics', tags=['SRV'])
@@ -0,0 +1,170 @@
+from collections import Counter
+from collections.abc import AsyncIterator
+from random import randint
+from typing import Any
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.assignees import assignees
+from app.db import AsyncSession
+from app.models.entities import Task
+from app.models.events import (
+    AddedTaskBE,
+    AddedTaskData,
+    CreatedTaskCUD,
+    CreatedTaskData,
+    EventMeta,
+)
+from app.outbox import publish
+
+from .schemas import PostSchema
+
+CHUNK_SIZE = 1000
+
+NDJSON = 'application/x-ndjson'
+
+_tasks = TypeAdapter(list[PostSchema])
+
+
+class BulkReportSchema(BaseModel):
+    created: int = 0
+
+
+class BulkErrorSchema(BulkReportSchema):
+    '''Why the rest failed, with the tasks committed before it'''
+
+    detail: Any
+
+
+def bulk_error(
+    report: BulkReportSchema,
+    status_code: int,
+    detail: Any,  # noqa: ANN401
+) -> JSONResponse:
+    return JSONResponse(
+        jsonable_encoder(BulkErrorSchema(created=report.created, detail=detail)),
+        status_code=status_code,
+    )
+
+
+def _invalid(e: ValidationError, line: int | None = None) -> RequestValidationError:
+    prefix = ('body',) if line is None else ('body', line)
+    return RequestValidationError(
+        [{**error, 'loc': (*prefix, *error['loc'])} for error in e.errors()],
+    )
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b''
+    async for data in request.stream():
+        *lines, buffer = (buffer + data).split(b'\n')
+        for line in lines:
+            yield line
+    yield buffer
+
+
+async def read_chunks(request: Request) -> AsyncIterator[list[PostSchema]]:
+    '''Tasks of a JSON array or NDJSON body, `CHUNK_SIZE` at a time
+
+    NDJSON is parsed while it is received, so a malformed line is reported
+    only after the chunks before it are handed out.
+    '''
+
+    if not request.headers.get('content-type', '').startswith(NDJSON):
+        try:
+            tasks = _tasks.validate_json(await request.body())
+        except ValidationError as e:
+            raise _invalid(e) from e
+        for start in range(0, len(tasks), CHUNK_SIZE):
+            yield tasks[start : start + CHUNK_SIZE]
+        return
+
+    chunk = []
+    number = 0
+    async for line in _ndjson_lines(request):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            chunk.append(PostSchema.model_validate_json(line))
+        except ValidationError as e:
+            raise _invalid(e, number) from e
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def unassign(assigned: Counter[UUID]) -> None:
+    '''Take back the index counts of tasks that were not committed'''
+
+    for assignee, count in assigned.items():
+        assignees.assigned(assignee, -count)
+
+
+async def create_chunk(
+    db_session: AsyncSession,
+    bodies: list[PostSchema],
+) -> Counter[UUID] | None:
+    '''Insert tasks with one statement and queue their events
+
+    The assignee index counts the tasks right away, see `unassign`. Returns
+    the number of tasks given to every assignee, or None if there is nobody
+    to assign them to.
+    '''
+
+    rows = []
+    for body in bodies:
+        assignee = assignees.pick()
+        if assignee is None:
+            unassign(Counter(row['assignee'] for row in rows))
+            return None
+        rows.append(
+            {
+                'pid': uuid4(),
+                **body.model_dump(),
+                'fee': randint(10, 20),  # noqa: S311
+                'award': randint(20, 40),  # noqa: S311
+                'assignee': assignee,
+            },
+        )
+        # Least-loaded picks have to see the tasks assigned so far
+        assignees.assigned(assignee)
+
+    assigned = Counter(row['assignee'] for row in rows)
+    try:
+        await db_session.execute(sa.insert(Task).values(rows))
+    except BaseException:
+        unassign(assigned)
+        raise
+
+    publish(
+        db_session,
+        'tasks-stream',
+        *(
+            CreatedTaskCUD(
+                meta=EventMeta(name='Tasks.Created'),
+                data=CreatedTaskData.model_validate(row),
+            )
+            for row in rows
+        ),
+    )
+    publish(
+        db_session,
+        'tasks.added',
+        *(
+            AddedTaskBE(
+                meta=EventMeta(name='Tasks.Added'),
+                data=AddedTaskData.model_validate(row),
+            )
+            for row in rows
+        ),
+    )
+    return assigned
@@ -0,0 +1,51 @@
+from uuid import UUID
+
+import sqlalchemy as sa
+from pydantic import BaseModel, Field
+
+from app.db import AsyncSession
+from app.models.entities import Task
+
+MAX_PIDS = 1000
+
+
+class BulkCompleteSchema(BaseModel):
+    pids: list[UUID] = Field(min_length=1, max_length=MAX_PIDS)
+
+
+class BulkCompleteReportSchema(BaseModel):
+    completed: list[UUID]
+
+
+async def complete_tasks(
+    db_session: AsyncSession,
+    assignee: UUID,
+    pids: list[UUID],
+) -> list[sa.Row]:
+    '''Complete open tasks of the assignee with one statement
+
+    Tasks that are not open or belong to someone else are left alone, and
+    concurrent completions of a task are serialized by its row lock, so
+    every task is returned once at most.
+    '''
+
+    result = await db_session.execute(
+        sa.update(Task)
+        .where(Task.pid.in_(pids), Task.assignee == assignee, ~Task.completed)
+        .values(completed=True)
+        .returning(Task.pid, Task.assignee, Task.award),
+    )
+    return list(result.all())
+
+
+async def is_completed(db_session: AsyncSession, assignee: UUID, pid: UUID) -> bool:
+    result = await db_session.execute(
+        sa.select(
+            sa.exists().where(
+                Task.pid == pid,
+                Task.assignee == assignee,
+                Task.completed,
+            ),
+        ),
+    )
+    return bool(result.scalar())
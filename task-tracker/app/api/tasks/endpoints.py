@@ -1,14 +1,19 @@
+import logging
+import time
+from collections.abc import AsyncIterator
 from random import randint
 from typing import Annotated
 from uuid import UUID, uuid4
 
 import sqlalchemy as sa
-from confluent_kafka import Producer
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.deps import get_current_user
+from app.api.deps import collection_etag, get_current_user
+from app.assignees import assignees
 from app.db import AsyncSession, get_session
-from app.kafka import get_producer
 from app.models.entities import Account, Task
 from app.models.enums import Role
 from app.models.events import (
@@ -16,25 +21,133 @@ from app.models.events import (
     AddedTaskData,
     CompletedTaskBE,
     CompletedTaskData,
+    CompletedTasksBE,
+    CompletedTasksData,
     CreatedTaskCUD,
     CreatedTaskData,
     EventMeta,
-    ReshaffledTaskBE, ReshaffledTaskData
+    ReshaffledTaskData,
+    ReshaffledTasksBE,
+    ReshaffledTasksData,
 )
+from app.outbox import publish
+from app.versions import versions
 
-from .schemas import GetSchema, PostSchema
+from .bulk import (
+    NDJSON,
+    BulkErrorSchema,
+    BulkReportSchema,
+    bulk_error,
+    create_chunk,
+    read_chunks,
+    unassign,
+)
+from .completion import (
+    BulkCompleteReportSchema,
+    BulkCompleteSchema,
+    complete_tasks,
+    is_completed,
+)
+from .reshuffle import (
+    CHUNK_SIZE,
+    EVENT_BATCH_SIZE,
+    ChunkReportSchema,
+    ReshuffleReportSchema,
+    has_workers,
+    reshuffle_chunk,
+)
+from .schemas import GetSchema, PageSchema, PostSchema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
 
 router = APIRouter()
 
 
-@router.get('/')
+def _tasks_query(
+    me: Account,
+    assignee: UUID | None,
+    completed: bool | None,
+    mine: bool,  # noqa: FBT001
+) -> sa.Select:
+    query = sa.select(
+        Task.id_,
+        Task.pid,
+        Task.description,
+        Task.assignee,
+        Task.fee,
+        Task.award,
+    )
+    if mine:
+        query = query.where(Task.assignee == me.pid)
+    if assignee is not None:
+        query = query.where(Task.assignee == assignee)
+    if completed is not None:
+        query = query.where(Task.completed == completed)
+    return query.order_by(Task.id_)
+
+
+async def _stream_tasks(
+    db_session: AsyncSession,
+    query: sa.Select,
+) -> AsyncIterator[bytes]:
+    result = await db_session.stream(
+        query.execution_options(yield_per=STREAM_BATCH_SIZE),
+    )
+    async for rows in result.partitions():
+        yield b''.join(
+            GetSchema.model_validate(row).model_dump_json().encode() + b'\n'
+            for row in rows
+        )
+
+
+@router.get(
+    '/',
+    response_model=PageSchema,
+    responses={200: {'content': {NDJSON: {}}}},
+)
 async def get_tasks(
-    _: Annotated[Account, Depends(get_current_user)],
+    request: Request,
+    response: Response,
+    etag: Annotated[str | None, Depends(collection_etag('tasks'))],
+    me: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-) -> list[GetSchema]:
-    result = await db_session.execute(sa.select(Task))
-    tasks = result.scalars().all()
-    return [GetSchema.model_validate(task, from_attributes=True) for task in tasks]
+    cursor: Annotated[int | None, Query(description='next_cursor of a page')] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    assignee: UUID | None = None,
+    completed: bool | None = None,
+    mine: bool = False,  # noqa: FBT001, FBT002
+) -> PageSchema | StreamingResponse:
+    '''Page of tasks, or every task from the cursor on as NDJSON
+
+    The NDJSON mode is chosen with `Accept: application/x-ndjson`, reads
+    a server-side cursor in batches and ignores `limit`. Both carry an ETag
+    for conditional requests.
+    '''
+
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'} if etag else {}
+
+    query = _tasks_query(me, assignee, completed, mine)
+    if cursor is not None:
+        query = query.where(Task.id_ > cursor)
+
+    if NDJSON in request.headers.get('accept', ''):
+        return StreamingResponse(
+            _stream_tasks(db_session, query),
+            media_type=NDJSON,
+            headers=headers,
+        )
+
+    # One extra row tells whether there is a next page
+    rows = (await db_session.execute(query.limit(limit + 1))).all()
+    response.headers.update(headers)
+    return PageSchema(
+        items=[GetSchema.model_validate(row) for row in rows[:limit]],
+        next_cursor=rows[limit - 1].id_ if len(rows) > limit else None,
+    )
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED)
@@ -42,19 +155,23 @@ async def create_task(
     body: PostSchema,
     me: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-    producer: Annotated[Producer, Depends(get_producer)],
 ) -> None:
     if me.role not in [Role.admin, Role.manager]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-    result = await db_session.execute(sa.select(Account))
-    accounts = result.scalars().all()
+    assignee = assignees.pick()
+    if assignee is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Нет исполнителей для распределения задач',
+        )
+
     task = Task(
         pid=uuid4(),
         **body.model_dump(),
         fee=randint(10, 20),  # noqa: S311
         award=randint(20, 40),  # noqa: S311
-        assignee=accounts[randint(0, len(accounts) - 1)],  # noqa: S311
+        assignee=assignee,
     )
     db_session.add(task)
 
@@ -62,20 +179,85 @@ async def create_task(
         meta=EventMeta(name='Tasks.Created'),
         data=CreatedTaskData.model_validate(task),
     )
-    producer.produce(
-        topic='tasks-stream',
-        value=event.model_dump_json(),
-    )
-    producer.flush()
+    publish(db_session, 'tasks-stream', event)
     event = AddedTaskBE(
         meta=EventMeta(name='Tasks.Added'),
         data=AddedTaskData.model_validate(task),
     )
-    producer.produce(
-        topic='tasks.added',
-        value=event.model_dump_json(),
-    )
+    publish(db_session, 'tasks.added', event)
+    await versions.bump(db_session, 'tasks')
     await db_session.commit()
+    assignees.assigned(assignee)
+
+
+@router.post(
+    '/bulk',
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkReportSchema,
+    responses={
+        status.HTTP_409_CONFLICT: {'model': BulkErrorSchema},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {'model': BulkErrorSchema},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {'model': BulkErrorSchema},
+    },
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {
+                    'schema': {
+                        'type': 'array',
+                        'items': {'$ref': '#/components/schemas/PostSchema'},
+                    },
+                },
+                NDJSON: {'schema': {'$ref': '#/components/schemas/PostSchema'}},
+            },
+        },
+    },
+)
+async def create_tasks(
+    request: Request,
+    me: Annotated[Account, Depends(get_current_user)],
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+) -> BulkReportSchema | JSONResponse:
+    '''Create tasks from a JSON array or an NDJSON stream
+
+    Tasks are inserted and committed chunk by chunk, so on a malformed
+    NDJSON line the chunks before it stay created. Errors tell how many
+    tasks were created before them.
+    '''
+
+    if me.role not in [Role.admin, Role.manager]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+    report = BulkReportSchema()
+    try:
+        async for bodies in read_chunks(request):
+            assigned = await create_chunk(db_session, bodies)
+            if assigned is None:
+                return bulk_error(
+                    report,
+                    status.HTTP_409_CONFLICT,
+                    'Нет исполнителей для распределения задач',
+                )
+            await versions.bump(db_session, 'tasks')
+            try:
+                await db_session.commit()
+            except BaseException:
+                unassign(assigned)
+                raise
+            report.created += len(bodies)
+    except RequestValidationError as e:
+        return bulk_error(report, status.HTTP_422_UNPROCESSABLE_ENTITY, e.errors())
+    except SQLAlchemyError:
+        logger.exception('Failed to create a chunk of tasks')
+        await db_session.rollback()
+        return bulk_error(
+            report,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            'Не удалось сохранить задачи',
+        )
+
+    return report
 
 
 @router.put('/{pid}/complete', status_code=status.HTTP_204_NO_CONTENT)
@@ -83,50 +265,112 @@ async def mark_task_completed(
     pid: UUID,
     me: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-    producer: Annotated[Producer, Depends(get_producer)],
 ) -> None:
-    result = await db_session.execute(sa.select(Task).where(Task.pid == pid))
-    task = result.scalar()
-    if not task or task.assignee != me.pid:
+    '''Complete a task of mine, completing it again changes nothing'''
+
+    rows = await complete_tasks(db_session, me.pid, [pid])
+    if not rows:
+        if await is_completed(db_session, me.pid, pid):
+            return
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    task.completed = True
-    await db_session.flush([task])
     event = CompletedTaskBE(
         meta=EventMeta(name='Tasks.Completed'),
-        data=CompletedTaskData.model_validate(task, from_attributes=True),
-    )
-    producer.produce(
-        topic='tasks.completed',
-        value=event.model_dump_json(),
+        data=CompletedTaskData.model_validate(rows[0]),
     )
-    producer.flush()
+    publish(db_session, 'tasks.completed', event)
+    await versions.bump(db_session, 'tasks')
     await db_session.commit()
+    assignees.assigned(me.pid, -1)
 
 
-@router.post('/reshaffle', status_code=status.HTTP_204_NO_CONTENT)
+@router.post('/complete')
+async def mark_tasks_completed(
+    body: BulkCompleteSchema,
+    me: Annotated[Account, Depends(get_current_user)],
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+) -> BulkCompleteReportSchema:
+    '''Complete many tasks of mine, returning those completed just now
+
+    Pids of tasks that are unknown, already completed or assigned to
+    someone else are skipped.
+    '''
+
+    rows = await complete_tasks(db_session, me.pid, body.pids)
+    for start in range(0, len(rows), EVENT_BATCH_SIZE):
+        event = CompletedTasksBE(
+            meta=EventMeta(name='Tasks.Completed'),
+            data=CompletedTasksData(
+                tasks=[
+                    CompletedTaskData.model_validate(row)
+                    for row in rows[start : start + EVENT_BATCH_SIZE]
+                ],
+            ),
+        )
+        publish(db_session, 'tasks.completed', event)
+    if rows:
+        await versions.bump(db_session, 'tasks')
+    await db_session.commit()
+    assignees.assigned(me.pid, -len(rows))
+
+    return BulkCompleteReportSchema(completed=[row.pid for row in rows])
+
+
+@router.post('/reshaffle')
 async def _(
     me: Annotated[Account, Depends(get_current_user)],
     db_session: Annotated[AsyncSession, Depends(get_session)],
-    producer: Annotated[Producer, Depends(get_producer)],
-) -> None:
+) -> ReshuffleReportSchema:
+    '''Reassign every open task to a random worker, chunk by chunk'''
+
     if me.role not in [Role.admin, Role.manager]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
-    tasks = (await db_session.execute(sa.select(Task))).scalars().all()
-    accounts = (await db_session.execute(sa.select(Task))).scalars().all()
-    for task in tasks:
-        task.assignee = accounts[randint(0, len(accounts) - 1)].pid  # noqa: S311
-
-    await db_session.flush(tasks)
-    for task in tasks:
-        event = ReshaffledTaskBE(
-            meta=EventMeta(name='Tasks.Reshaffled'),
-            data=ReshaffledTaskData.model_validate(task, from_attributes=True),
+    if not await has_workers(db_session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Нет исполнителей для распределения задач',
+        )
+
+    report = ReshuffleReportSchema()
+    after = 0
+    while True:
+        started = time.perf_counter()
+        rows = await reshuffle_chunk(db_session, after)
+        for start in range(0, len(rows), EVENT_BATCH_SIZE):
+            event = ReshaffledTasksBE(
+                meta=EventMeta(name='Tasks.Reshaffled'),
+                data=ReshaffledTasksData(
+                    assignments=[
+                        ReshaffledTaskData.model_validate(row)
+                        for row in rows[start : start + EVENT_BATCH_SIZE]
+                    ],
+                ),
+            )
+            publish(db_session, 'tasks.reshaffled', event)
+        if rows:
+            await versions.bump(db_session, 'tasks')
+        await db_session.commit()
+        for row in rows:
+            assignees.assigned(row.previous, -1)
+            assignees.assigned(row.assignee)
+
+        if not rows:
+            break
+        # RETURNING does not keep the CTE order
+        after = max(row.id_ for row in rows)
+        chunk = ChunkReportSchema(
+            tasks=len(rows),
+            seconds=time.perf_counter() - started,
         )
-        producer.produce(
-            topic='tasks.reshaffled',
-            value=event.model_dump_json(),
+        logger.info(
+            'Reshuffled %d tasks up to id %d in %.3fs',
+            chunk.tasks,
+            after,
+            chunk.seconds,
         )
-    producer.flush()
-    await db_session.commit()
+        report.chunks.append(chunk)
+        report.reassigned += chunk.tasks
+        if len(rows) < CHUNK_SIZE:
+            break
+
+    return report
@@ -0,0 +1,64 @@
+import sqlalchemy as sa
+from pydantic import BaseModel
+
+from app.db import AsyncSession
+from app.models.entities import Account, Task
+from app.models.enums import Role
+
+CHUNK_SIZE = 5000
+EVENT_BATCH_SIZE = 1000
+
+
+class ChunkReportSchema(BaseModel):
+    tasks: int
+    seconds: float
+
+
+class ReshuffleReportSchema(BaseModel):
+    reassigned: int = 0
+    chunks: list[ChunkReportSchema] = []
+
+
+async def has_workers(db_session: AsyncSession) -> bool:
+    result = await db_session.execute(
+        sa.select(sa.exists().where(Account.role == Role.worker, ~Account.deleted)),
+    )
+    return bool(result.scalar())
+
+
+async def reshuffle_chunk(
+    db_session: AsyncSession,
+    after: int,
+    size: int = CHUNK_SIZE,
+) -> list[sa.Row]:
+    '''Reassign the next open tasks after `after` to random workers
+
+    A single UPDATE ... RETURNING; rows locked by concurrent requests are
+    skipped rather than waited for, so each chunk holds its locks briefly.
+    '''
+
+    batch = (
+        sa.select(Task.id_, Task.assignee.label('previous'))
+        .where(~Task.completed, Task.id_ > after)
+        .order_by(Task.id_)
+        .limit(size)
+        .with_for_update(skip_locked=True)
+        .cte('batch')
+    )
+    workers = (
+        sa.select(sa.func.array_agg(Account.pid).label('pids'))
+        .where(Account.role == Role.worker, ~Account.deleted)
+        .cte('workers')
+    )
+    pids = workers.c.pids
+    # random() is volatile, so it is evaluated for every updated row
+    index = sa.func.floor(sa.func.random() * sa.func.cardinality(pids))
+    pick = pids[sa.cast(index, sa.Integer) + 1]
+
+    result = await db_session.execute(
+        sa.update(Task)
+        .values(assignee=pick)
+        .where(Task.id_ == batch.c.id_, pids.is_not(None))
+        .returning(Task.id_, Task.pid, Task.assignee, Task.fee, batch.c.previous),
+    )
+    return list(result.all())
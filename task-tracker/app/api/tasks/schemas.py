@@ -13,5 +13,10 @@ class GetSchema(BaseModel):
     award: float
 
 
+class PageSchema(BaseModel):
+    items: list[GetSchema]
+    next_cursor: int | None = None
+
+
 class PostSchema(BaseModel):
     description: str
@@ -0,0 +1,134 @@
+import asyncio
+import heapq
+import logging
+import random
+from datetime import timedelta
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import maker
+from app.models.entities import Account, Task
+from app.models.enums import Role
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AssigneeIndex:
+    '''Workers that can be assigned tasks, with their open task counts
+
+    Uniform picks use a list with swap-remove, least-loaded picks use a heap
+    whose stale entries are skipped lazily. The index belongs to this process
+    and only sees its own task mutations, so it is rebuilt from the database
+    every `rebuild_interval` to pick up changes made by other processes.
+    '''
+
+    def __init__(self, rebuild_interval: timedelta) -> None:
+        self.rebuild_interval = rebuild_interval.total_seconds()
+        self._pids: list[UUID] = []
+        self._positions: dict[UUID, int] = {}
+        self._open_tasks: dict[UUID, int] = {}
+        self._heap: list[tuple[int, UUID]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pids)
+
+    def __contains__(self, pid: UUID) -> bool:
+        return pid in self._positions
+
+    def add(self, pid: UUID, open_tasks: int = 0) -> None:
+        if pid in self._positions:
+            return
+
+        self._positions[pid] = len(self._pids)
+        self._pids.append(pid)
+        self._open_tasks[pid] = open_tasks
+        heapq.heappush(self._heap, (open_tasks, pid))
+
+    def remove(self, pid: UUID) -> None:
+        position = self._positions.pop(pid, None)
+        if position is None:
+            return
+
+        last = self._pids.pop()
+        if last != pid:
+            self._pids[position] = last
+            self._positions[last] = position
+        del self._open_tasks[pid]
+        self._compact()
+
+    def assigned(self, pid: UUID, count: int = 1) -> None:
+        '''Account for tasks given to or taken from the worker'''
+
+        if pid not in self._open_tasks:
+            return
+
+        self._open_tasks[pid] = max(0, self._open_tasks[pid] + count)
+        heapq.heappush(self._heap, (self._open_tasks[pid], pid))
+        self._compact()
+
+    def pick_random(self) -> UUID | None:
+        if not self._pids:
+            return None
+        return random.choice(self._pids)  # noqa: S311
+
+    def pick_least_loaded(self) -> UUID | None:
+        while self._heap:
+            open_tasks, pid = self._heap[0]
+            if self._open_tasks.get(pid) == open_tasks:
+                return pid
+            heapq.heappop(self._heap)
+
+        return None
+
+    def pick(self) -> UUID | None:
+        if get_settings().tasks.ASSIGNMENT == 'least_loaded':
+            return self.pick_least_loaded()
+        return self.pick_random()
+
+    def _compact(self) -> None:
+        # Stale entries are dropped lazily; rebuild once they dominate the heap
+        if len(self._heap) > 2 * len(self._open_tasks) + 64:
+            self._heap = [(count, pid) for pid, count in self._open_tasks.items()]
+            heapq.heapify(self._heap)
+
+    async def rebuild(self) -> None:
+        async with maker() as session:
+            result = await session.execute(
+                sa.select(Account.pid, sa.func.count(Task.id_))
+                .outerjoin(
+                    Task,
+                    sa.and_(Task.assignee == Account.pid, ~Task.completed),
+                )
+                .where(Account.role == Role.worker, ~Account.deleted)
+                .group_by(Account.pid),
+            )
+            open_tasks = dict(result.tuples().all())
+
+        self._pids = list(open_tasks)
+        self._positions = {pid: position for position, pid in enumerate(self._pids)}
+        self._open_tasks = open_tasks
+        self._heap = [(count, pid) for pid, count in open_tasks.items()]
+        heapq.heapify(self._heap)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.rebuild_interval)
+            try:
+                await self.rebuild()
+            except (OSError, SQLAlchemyError):
+                logger.exception('Failed to rebuild the assignee index')
+
+    async def start(self) -> None:
+        await self.rebuild()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+assignees = AssigneeIndex(get_settings().tasks.ASSIGNEES_REBUILD_INTERVAL)
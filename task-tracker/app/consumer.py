@@ -1,48 +1,132 @@
-import asyncio
+import logging
+from uuid import UUID
 
 import sqlalchemy as sa
-from confluent_kafka import Consumer
+from confluent_kafka import Message
+from sqlalchemy.dialects import postgresql
 
-from app.db import get_session
+from app.assignees import assignees
+from app.db import maker
+from app.dedupe import processed_events
 from app.models.entities import Account
-from app.models.events import CreateAccountCUD
+from app.models.enums import Role
+from app.models.events import CreateAccountCUD, DeleteAccountCUD, UpdateAccountCUD
+from app.partitions import PartitionedConsumer
+from app.retries import RetryPolicy, original_offset
+from app.routing import EventRouter
 from app.settings import get_settings
 
-consumer = Consumer({'bootstrap.servers': get_settings().kafka.URI})
-consumer.subscribe(['accounts-stream'])
+logger = logging.getLogger(__name__)
 
+TOPIC = 'accounts-stream'
 
-async def loop() -> None:
-    db_session = await get_session().__anext__()
-    while True:
-        msg = consumer.poll(10)
-        if msg is None:
-            continue
 
-        if msg.error():
-            print(f'Consumer error: {msg.error()}')
-            continue
+router = EventRouter()
 
-        event = CreateAccountCUD.model_validate_json(msg.value())
 
-        account = (
-            await db_session.execute(
-                sa.select(Account).where(Account.pid == event.data.pid),
-            )
-        ).scalar()
-        if account:
-            account.role = event.data.role
-            await db_session.flush([account])
-            continue
+# Last known state per account, role None once deleted, with its offset
+Changes = dict[UUID, tuple[Role | None, int]]
 
-        db_session.add(
-            Account(
-                pid=event.data.pid,
-                role=event.data.role,
-            ),
-        )
-        await db_session.commit()
 
+def _change(changes: Changes, pid: UUID, role: Role | None, offset: int) -> None:
+    # Retried messages arrive late, only a newer offset may win
+    if offset > changes.get(pid, (None, -1))[1]:
+        changes[pid] = (role, offset)
 
-def start_consumer() -> None:
-    asyncio.run(loop())
+
+@router.route('Accounts.CreateAccount', CreateAccountCUD)
+@router.route('Accounts.UpdateAccount', UpdateAccountCUD)
+def _saved(
+    event: CreateAccountCUD | UpdateAccountCUD,
+    changes: Changes,
+    offset: int,
+) -> None:
+    _change(changes, event.data.pid, event.data.role, offset)
+
+
+@router.route('Accounts.DeleteAccount', DeleteAccountCUD)
+def _deleted(event: DeleteAccountCUD, changes: Changes, offset: int) -> None:
+    _change(changes, event.data.pid, None, offset)
+
+
+def _upsert(values: list[dict], *, deleted: bool) -> sa.Insert:
+    '''Apply account states unless the stored one comes from a later offset
+
+    Deletions are upserted too, so a create retried after the deletion of
+    an account finds it and cannot bring it back.
+    '''
+
+    statement = postgresql.insert(Account).values(values)
+    set_ = {'deleted': deleted, 'last_offset': statement.excluded.last_offset}
+    if not deleted:
+        set_['role'] = statement.excluded.role
+    return statement.on_conflict_do_update(
+        index_elements=[Account.pid],
+        set_=set_,
+        where=Account.last_offset < statement.excluded.last_offset,
+    ).returning(Account.pid, Account.role)
+
+
+async def handle(messages: list[Message]) -> None:
+    '''Store a batch of account events with one upsert per kind
+
+    Events already processed are dropped and the rest is collapsed to the
+    last state of every account. Events are ordered by the offset they had
+    on the accounts topic, which retried messages carry along, so a late
+    retry never overwrites a newer state. Malformed events raise
+    ValidationError and fail the batch.
+    '''
+
+    offsets: dict[UUID, int] = {}
+    events = []
+    for msg in messages:
+        event = router.decode(msg.value(), msg.headers())
+        if event is not None:
+            offsets[event.meta.event_id] = original_offset(msg)
+            events.append(event)
+
+    changes: Changes = {}
+    async with maker() as session:
+        events = await processed_events.claim(session, events)
+        for event in events:
+            router.apply(event, changes, offsets[event.meta.event_id])
+
+        saved = [
+            {'pid': pid, 'role': role, 'last_offset': offset}
+            for pid, (role, offset) in changes.items()
+            if role is not None
+        ]
+        deleted = [
+            {'pid': pid, 'deleted': True, 'last_offset': offset}
+            for pid, (role, offset) in changes.items()
+            if role is None
+        ]
+        applied: dict[UUID, Role | None] = {}
+        if saved:
+            result = await session.execute(_upsert(saved, deleted=False))
+            applied |= dict(result.tuples().all())
+        if deleted:
+            result = await session.execute(_upsert(deleted, deleted=True))
+            applied |= {pid: None for pid, _ in result.tuples()}
+        await session.commit()
+
+    processed_events.remember(
+        event.meta.event_id
+        for event in events
+        if 'event_id' in event.meta.model_fields_set
+    )
+    for pid, role in applied.items():
+        if role == Role.worker:
+            assignees.add(pid)
+        else:
+            assignees.remove(pid)
+    await processed_events.prune()
+
+
+accounts_consumer = PartitionedConsumer(
+    topics=[TOPIC],
+    handle=handle,
+    batch_size=get_settings().kafka.CONSUME_BATCH_SIZE,
+    timeout=get_settings().kafka.CONSUME_TIMEOUT.total_seconds(),
+    retries=RetryPolicy(get_settings().kafka.RETRY_DELAYS),
+)
@@ -0,0 +1,116 @@
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import timedelta
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import AsyncSession, maker
+from app.models.entities import ProcessedEvent
+from app.models.events import BaseEvent
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 60 * 60
+
+
+class ProcessedEvents:
+    '''Drops events that were already applied
+
+    The `processed_events` table is the source of truth: ids are claimed
+    there in the transaction that applies the events, so an event is either
+    applied and recorded or neither. A bounded LRU of committed ids answers
+    for recent redeliveries without a round trip. Ids are kept for
+    `retention`, events redelivered or replayed later are applied again.
+    Events published without an id cannot be told apart and are never
+    dropped.
+    '''
+
+    def __init__(self, cache_size: int, retention: timedelta) -> None:
+        self.cache_size = cache_size
+        self.retention = retention
+        self._cache: OrderedDict[UUID, None] = OrderedDict()
+        self._pruned_at = 0.0
+
+    def __contains__(self, event_id: UUID) -> bool:
+        if event_id not in self._cache:
+            return False
+
+        self._cache.move_to_end(event_id)
+        return True
+
+    def remember(self, event_ids: Iterable[UUID]) -> None:
+        '''Cache ids once the transaction that claimed them is committed'''
+
+        for event_id in event_ids:
+            self._cache[event_id] = None
+            self._cache.move_to_end(event_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def claim(
+        self,
+        db_session: AsyncSession,
+        events: list[BaseEvent],
+    ) -> list[BaseEvent]:
+        '''Record the events as processed, returning those seen for the first time
+
+        A concurrent claim of the same id waits for the other transaction
+        and, if it commits, skips the event.
+        '''
+
+        # Ids not in the payload are made up on decode, nothing to claim
+        anonymous = [
+            event for event in events if 'event_id' not in event.meta.model_fields_set
+        ]
+        unseen = {
+            event.meta.event_id: event
+            for event in events
+            if 'event_id' in event.meta.model_fields_set
+            and event.meta.event_id not in self
+        }
+        if not unseen:
+            return anonymous
+
+        result = await db_session.execute(
+            postgresql.insert(ProcessedEvent)
+            .values([{'event_id': event_id} for event_id in unseen])
+            .on_conflict_do_nothing()
+            .returning(ProcessedEvent.event_id),
+        )
+        claimed = set(result.scalars())
+        return anonymous + [
+            event for event_id, event in unseen.items() if event_id in claimed
+        ]
+
+    async def prune(self) -> None:
+        '''Delete ids older than the retention, at most once per interval'''
+
+        if time.monotonic() - self._pruned_at < PRUNE_INTERVAL:
+            return
+
+        self._pruned_at = time.monotonic()
+        try:
+            async with maker() as session:
+                result = await session.execute(
+                    sa.delete(ProcessedEvent).where(
+                        ProcessedEvent.processed_at < sa.func.now() - self.retention,
+                    ),
+                )
+                await session.commit()
+        except (OSError, SQLAlchemyError):
+            # The batch is committed already, the next interval tries again
+            logger.exception('Could not prune processed events')
+            return
+        logger.info('Pruned %s processed events', result.rowcount)
+
+
+processed_events = ProcessedEvents(
+    cache_size=get_settings().kafka.PROCESSED_CACHE_SIZE,
+    retention=get_settings().kafka.PROCESSED_RETENTION,
+)
@@ -0,0 +1,170 @@
+'''Inspect and replay dead-lettered events
+
+    poetry run dlq inspect
+    poetry run dlq replay --name Accounts.UpdateAccount --limit 1000
+
+Replayed events go back to their original topic without the retry headers,
+so they get the full set of retry tiers again. Their original offset is kept,
+so a replay cannot overwrite a newer state of the account. Replay progress is
+committed under its own consumer group, a rerun continues where the last one
+stopped.
+'''
+import argparse
+import asyncio
+import logging
+from collections.abc import Iterator
+
+from confluent_kafka import OFFSET_INVALID, Consumer, Message, TopicPartition
+
+from app.consumer import TOPIC
+from app.kafka import EVENT_HEADER, producer
+from app.retries import (
+    ERROR_HEADER,
+    ORIGIN_HEADERS,
+    RETRY_HEADERS,
+    TOPIC_HEADER,
+    dlq_topic,
+    get_header,
+)
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 5
+MAX_VALUE_LENGTH = 200
+
+
+def _consumer(group: str) -> Consumer:
+    return Consumer(
+        {
+            'bootstrap.servers': get_settings().kafka.URI,
+            'group.id': group,
+            'enable.auto.commit': False,
+        },
+    )
+
+
+def _read(consumer: Consumer, topic: str, *, resume: bool) -> Iterator[Message]:
+    '''Messages of `topic` up to its current end, from the start or the
+    committed offsets'''
+
+    metadata = consumer.list_topics(topic, timeout=POLL_TIMEOUT).topics[topic]
+    partitions = [TopicPartition(topic, partition) for partition in metadata.partitions]
+    if resume:
+        partitions = consumer.committed(partitions, timeout=POLL_TIMEOUT)
+
+    ends = {}
+    for partition in partitions:
+        low, high = consumer.get_watermark_offsets(partition, timeout=POLL_TIMEOUT)
+        if partition.offset == OFFSET_INVALID or partition.offset < low:
+            partition.offset = low
+        if partition.offset < high:
+            ends[partition.partition] = high
+
+    consumer.assign([p for p in partitions if p.partition in ends])
+    while ends:
+        msg = consumer.poll(POLL_TIMEOUT)
+        if msg is None:
+            logger.warning('Stopped waiting for %s', topic)
+            return
+        if msg.error():
+            logger.error('Consumer error: %s', msg.error())
+            continue
+
+        if msg.offset() + 1 >= ends.get(msg.partition(), 0):
+            ends.pop(msg.partition(), None)
+        yield msg
+
+
+def inspect(topic: str, limit: int | None) -> None:
+    consumer = _consumer(f'{get_settings().kafka.GROUP_ID}-dlq-inspect')
+    try:
+        for count, msg in enumerate(_read(consumer, topic, resume=False), 1):
+            value = msg.value().decode(errors='replace')
+            print(
+                f'{msg.partition()}:{msg.offset()}',
+                get_header(msg, EVENT_HEADER),
+                f'key={msg.key().decode() if msg.key() else None}',
+                f'from={get_header(msg, TOPIC_HEADER)}',
+                f'error={get_header(msg, ERROR_HEADER)!r}',
+                value[:MAX_VALUE_LENGTH],
+                sep='\t',
+            )
+            if count == limit:
+                break
+    finally:
+        consumer.close()
+
+
+async def replay(topic: str, limit: int | None, name: str | None) -> None:
+    '''Republish to the original topic, skipping events not named `name`
+
+    Progress of a partition is committed up to its first skipped event, so
+    a later replay with another name still sees it.
+    '''
+
+    consumer = _consumer(f'{get_settings().kafka.GROUP_ID}-dlq-replay')
+    await producer.start()
+    try:
+        deliveries = []
+        # Next offset to commit per partition, frozen at the first skip
+        offsets: dict[int, int] = {}
+        skipped: set[int] = set()
+        for msg in _read(consumer, topic, resume=True):
+            if name and get_header(msg, EVENT_HEADER) != name:
+                skipped.add(msg.partition())
+                continue
+
+            headers = {
+                key: value
+                for key, value in msg.headers() or ()
+                if key not in RETRY_HEADERS - ORIGIN_HEADERS and value is not None
+            }
+            deliveries.append(
+                producer.produce(
+                    get_header(msg, TOPIC_HEADER) or TOPIC,
+                    msg.value(),
+                    msg.key(),
+                    headers=headers,
+                ),
+            )
+            if msg.partition() not in skipped:
+                offsets[msg.partition()] = msg.offset() + 1
+            if len(deliveries) == limit:
+                break
+
+        await asyncio.gather(*deliveries)
+        if offsets:
+            consumer.commit(
+                offsets=[
+                    TopicPartition(topic, partition, offset)
+                    for partition, offset in offsets.items()
+                ],
+                asynchronous=False,
+            )
+        print(f'Replayed {len(deliveries)} events from {topic}')
+    finally:
+        await producer.stop()
+        consumer.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('command', choices=['inspect', 'replay'])
+    parser.add_argument('--topic', default=dlq_topic(TOPIC))
+    parser.add_argument('--limit', type=int, help='stop after this many events')
+    parser.add_argument('--name', help='replay only events with this name')
+    args = parser.parse_args()
+
+    if args.command == 'inspect':
+        inspect(args.topic, args.limit)
+    else:
+        asyncio.run(replay(args.topic, args.limit, args.name))
+
+
+if __name__ == '__main__':
+    main()
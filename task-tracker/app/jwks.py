@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any
+
+from httpx import HTTPError
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+from app.http_client import http_client
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class KeySet:
+    '''Auth service public keys, refreshed in the background
+
+    Tokens signed with an unknown `kid` trigger an out-of-band refresh,
+    rate limited by `min_refresh_interval`, so key rotation is picked up
+    without waiting for the next scheduled refresh.
+    '''
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: timedelta,
+        min_refresh_interval: timedelta = timedelta(seconds=10),
+    ) -> None:
+        self.url = url
+        self.refresh_interval = refresh_interval.total_seconds()
+        self.min_refresh_interval = min_refresh_interval.total_seconds()
+        self._keys: dict[str, tuple[Key, str]] = {}
+        self._refreshed_at = 0.0
+        self._refreshing: asyncio.Task[None] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def refresh(self) -> None:
+        response = await http_client.get(self.url)
+        response.raise_for_status()
+
+        payload = response.json()
+        if not isinstance(payload, dict) or not isinstance(payload.get('keys'), list):
+            raise TypeError('Malformed JWKS document')
+
+        keys: dict[str, tuple[Key, str]] = {}
+        for data in payload['keys']:
+            algorithm = data.get('alg', 'RS256')
+            keys[data['kid']] = (jwk.construct(data, algorithm), algorithm)
+
+        self._keys = keys
+        self._refreshed_at = time.monotonic()
+
+    async def decode(self, token: str) -> dict[str, Any]:
+        '''Verify the token against the key set, return its claims'''
+
+        kid = jwt.get_unverified_header(token).get('kid')
+        entry = await self.get(kid) if kid else None
+        if entry is None:
+            raise JWTError('Unknown signing key')
+
+        key, algorithm = entry
+        return jwt.decode(token, key, algorithms=[algorithm])
+
+    async def get(self, kid: str) -> tuple[Key, str] | None:
+        if kid not in self._keys and (
+            time.monotonic() - self._refreshed_at > self.min_refresh_interval
+        ):
+            # Share one refresh between all requests with the new kid
+            if self._refreshing is None or self._refreshing.done():
+                self._refreshing = asyncio.create_task(self.refresh())
+            try:
+                await asyncio.shield(self._refreshing)
+            except (HTTPError, JWTError, KeyError, TypeError, ValueError):
+                logger.exception('Failed to refresh key set')
+
+        return self._keys.get(kid)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except (HTTPError, JWTError, KeyError, TypeError, ValueError):
+                logger.exception('Failed to refresh key set')
+                await asyncio.sleep(self.min_refresh_interval)
+                continue
+
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+key_set = KeySet(
+    url=str(get_settings().auth.JWKS_URL),
+    refresh_interval=get_settings().auth.JWKS_REFRESH_INTERVAL,
+)
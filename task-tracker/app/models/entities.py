@@ -1,23 +1,70 @@
+from datetime import datetime
 from uuid import UUID
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .enums import Role
-from .mixins import ExternalEntityMixin, InternalEntityMixin
+from .mixins import Base, ExternalEntityMixin, InternalEntityMixin
 
 
 class Account(ExternalEntityMixin):
     __tablename__ = 'accounts'
 
     role: Mapped[Role] = mapped_column(default=Role.worker)
+    # Tasks keep referencing deleted accounts, so they are only marked
+    deleted: Mapped[bool] = mapped_column(default=False, server_default=sa.false())
+    # Offset of the last applied event, older ones arriving late are skipped
+    last_offset: Mapped[int] = mapped_column(
+        sa.BigInteger,
+        default=-1,
+        server_default='-1',
+    )
 
 
 class Task(InternalEntityMixin):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        sa.Index('ix_tasks_assignee_completed_id', 'assignee', 'completed', 'id'),
+        sa.Index('ix_tasks_completed_id', 'completed', 'id'),
+    )
 
     description: Mapped[str] = mapped_column()
     completed: Mapped[bool] = mapped_column(default=False)
     fee: Mapped[float] = mapped_column()
     award: Mapped[float] = mapped_column()
     assignee: Mapped[UUID] = mapped_column(sa.ForeignKey('accounts.pid'))
+
+
+class OutboxMessage(Base):
+    '''Event waiting to be published by the relay'''
+
+    __tablename__ = 'outbox'
+
+    id_: Mapped[int] = mapped_column('id', sa.BigInteger, primary_key=True)
+    topic: Mapped[str] = mapped_column()
+    key: Mapped[str | None] = mapped_column(index=True)
+    name: Mapped[str] = mapped_column()
+    value: Mapped[str] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(server_default=sa.func.now())
+
+
+class ProcessedEvent(Base):
+    '''Consumed event, recorded in the transaction that applied it'''
+
+    __tablename__ = 'processed_events'
+
+    event_id: Mapped[UUID] = mapped_column(primary_key=True)
+    processed_at: Mapped[datetime] = mapped_column(
+        server_default=sa.func.now(),
+        index=True,
+    )
+
+
+class CollectionVersion(Base):
+    '''Version of a collection, incremented by every write to it'''
+
+    __tablename__ = 'collection_versions'
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(sa.BigInteger)
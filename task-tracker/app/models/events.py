@@ -1,14 +1,18 @@
 from datetime import UTC, datetime
 from typing import Generic, TypeVar
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 from app.models.enums import Role
 
 
 class EventMeta(BaseModel):
-    created_at: int = Field(default_factory=lambda: datetime.now(UTC).timestamp())
+    # Unique per event, lets consumers drop redeliveries and replays
+    event_id: UUID = Field(default_factory=uuid4)
+    created_at: int = Field(
+        default_factory=lambda: int(datetime.now(UTC).timestamp()),
+    )
     name: str
 
 
@@ -58,6 +62,26 @@ class ReshaffledTaskBE(BaseEvent[ReshaffledTaskData]):
     '''BE Event produced on Task reshaffled'''
 
 
+class ReshaffledTasksData(BaseModel):
+    assignments: list[ReshaffledTaskData]
+
+
+class ReshaffledTasksBE(BaseEvent[ReshaffledTasksData]):
+    '''BE Event produced on Tasks reshaffled, one per batch of assignments'''
+
+
+_reshaffled = TypeAdapter(ReshaffledTasksBE | ReshaffledTaskBE)
+
+
+def decode_reshaffled(value: str | bytes) -> list[ReshaffledTaskData]:
+    '''Assignments of a `tasks.reshaffled` message, batched or not'''
+
+    event = _reshaffled.validate_json(value)
+    if isinstance(event, ReshaffledTasksBE):
+        return event.data.assignments
+    return [event.data]
+
+
 class CompletedTaskData(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -70,6 +94,26 @@ class CompletedTaskBE(BaseEvent[CompletedTaskData]):
     '''BE Event produced on Task completed'''
 
 
+class CompletedTasksData(BaseModel):
+    tasks: list[CompletedTaskData]
+
+
+class CompletedTasksBE(BaseEvent[CompletedTasksData]):
+    '''BE Event produced on Tasks completed in bulk, one per batch of tasks'''
+
+
+_completed = TypeAdapter(CompletedTasksBE | CompletedTaskBE)
+
+
+def decode_completed(value: str | bytes) -> list[CompletedTaskData]:
+    '''Tasks of a `tasks.completed` message, batched or not'''
+
+    event = _completed.validate_json(value)
+    if isinstance(event, CompletedTasksBE):
+        return event.data.tasks
+    return [event.data]
+
+
 class CreateAccountData(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -80,3 +124,32 @@ class CreateAccountData(BaseModel):
 
 class CreateAccountCUD(BaseEvent[CreateAccountData]):
     '''CUD Event produced on account creation'''
+
+
+class UpdateAccountData(BaseModel):
+    pid: UUID
+    role: Role
+    email: str
+
+
+class UpdateAccountCUD(BaseEvent[UpdateAccountData]):
+    '''CUD Event produced on account editing'''
+
+
+class DeleteAccountData(BaseModel):
+    pid: UUID
+
+
+class DeleteAccountCUD(BaseEvent[DeleteAccountData]):
+    '''CUD Event produced on account deletion'''
+
+
+class RevokedTokensData(BaseModel):
+    pid: UUID
+    issued_before: float
+    # When every revoked token has expired, None from older producers
+    expires_before: float | None = None
+
+
+class RevokedTokensBE(BaseEvent[RevokedTokensData]):
+    '''BE Event produced when access tokens of an account are revoked'''
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import signal
+import time
+from collections.abc import Awaitable, Callable
+
+from confluent_kafka import Consumer, KafkaException, Message, TopicPartition
+from pydantic import ValidationError
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.retries import RetryPolicy
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[list[Message]], Awaitable[None]]
+Partition = tuple[str, int]
+FailureHandler = Callable[['PartitionWorker', BaseException], None]
+
+RETRY_DELAY = 5
+REVOKE_TIMEOUT = 30
+REPORT_INTERVAL = 60
+# The database is unreachable, nothing on any partition can succeed
+TRANSIENT_ERRORS = (OSError, OperationalError, InterfaceError)
+# Retrying cannot fix these, they go straight to the DLQ
+FATAL_ERRORS = (ValidationError,)
+# Batches queued per partition before fetching from it is paused
+MAX_PENDING_BATCHES = 4
+
+
+class PartitionWorker:
+    '''Handles the batches of one partition in order
+
+    Transient failures, when the database is unreachable, are retried in
+    place. A batch failing for any other reason is split, and only the
+    messages failing on their own are handed to the retry policy, so the
+    rest of the partition keeps flowing.
+    '''
+
+    def __init__(
+        self,
+        partition: Partition,
+        handle: Handler,
+        retries: RetryPolicy | None,
+        on_failure: FailureHandler,
+    ) -> None:
+        self.partition = partition
+        self.handle = handle
+        self.retries = retries
+        self.queue: asyncio.Queue[list[Message]] = asyncio.Queue()
+        # Next offset to commit, set once a batch is in the database
+        self.processed: int | None = None
+        self.committed: int | None = None
+        self.paused = False
+        self._on_failure = on_failure
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self._on_failure(self, task.exception())
+
+    async def _run(self) -> None:
+        while True:
+            messages = await self.queue.get()
+            if self.retries and (due := self.retries.due(messages[-1])):
+                # Retry tiers are ordered by due time; a sleeping worker
+                # fills its queue, which pauses fetching from the partition
+                await asyncio.sleep(max(0, due - time.time()))
+
+            await self._handle(messages)
+            self.processed = messages[-1].offset() + 1
+            self.queue.task_done()
+
+    async def _handle(self, messages: list[Message]) -> None:
+        while True:
+            try:
+                await self.handle(messages)
+            except TRANSIENT_ERRORS:
+                logger.exception('Failed to handle a batch of %s', self.partition)
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+            except Exception as e:  # noqa: BLE001
+                if self.retries is None:
+                    raise
+                if len(messages) > 1:
+                    break
+
+                await self._route(messages[0], e)
+            return
+
+        for msg in messages:
+            await self._handle([msg])
+
+    async def _route(self, msg: Message, error: Exception) -> None:
+        logger.warning('Routing a failed message of %s: %s', self.partition, error)
+        while True:
+            try:
+                await self.retries.route(
+                    msg,
+                    error,
+                    retry=not isinstance(error, FATAL_ERRORS),
+                )
+            except (KafkaException, BufferError):
+                # BufferError: the producer queue is full until it flushes
+                logger.exception('Failed to route a message of %s', self.partition)
+                await asyncio.sleep(RETRY_DELAY)
+            else:
+                return
+
+    async def drain(self) -> None:
+        try:
+            await asyncio.wait_for(self.queue.join(), REVOKE_TIMEOUT)
+        except TimeoutError:
+            # Whatever is left is redelivered to the next owner
+            logger.warning('Gave up draining %s', self.partition)
+        self.cancel()
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+class PartitionedConsumer:
+    '''Consumes partitions concurrently, each one strictly in order
+
+    Every assigned partition gets a worker task, so a slow partition does
+    not hold back the others while messages of one key, which share a
+    partition, are still handled in order. Offsets are committed once the
+    worker has stored the batch; on rebalance, revoked partitions are
+    drained and committed before they are handed over.
+    '''
+
+    def __init__(
+        self,
+        topics: list[str],
+        handle: Handler,
+        batch_size: int,
+        timeout: float,
+        retries: RetryPolicy | None = None,
+    ) -> None:
+        self.topics = topics
+        self.handle = handle
+        self.retries = retries
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._consumer: Consumer | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._workers: dict[Partition, PartitionWorker] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._stopped = asyncio.Event()
+        self._consumed = 0
+        self._reported_at = time.monotonic()
+
+    def _worker(self, partition: Partition) -> PartitionWorker:
+        worker = self._workers.get(partition)
+        if worker is None:
+            worker = self._workers[partition] = PartitionWorker(
+                partition,
+                self.handle,
+                self.retries,
+                self._on_worker_failure,
+            )
+        return worker
+
+    def _on_worker_failure(self, worker: PartitionWorker, error: BaseException) -> None:
+        '''A worker died, nothing of its partition is handled any more
+
+        Consuming stops and the process is terminated to be restarted, the
+        partition resumes from its last committed offset.
+        '''
+
+        logger.critical(
+            'Worker of %s died, stopping the consumer',
+            worker.partition,
+            exc_info=error,
+        )
+        # Its queue never drains, keep it out of revocations and commits
+        if self._workers.get(worker.partition) is worker:
+            del self._workers[worker.partition]
+        self._stopped.set()
+        signal.raise_signal(signal.SIGTERM)
+
+    def _dispatch(self, messages: list[Message]) -> None:
+        batches: dict[Partition, list[Message]] = {}
+        for msg in messages:
+            if msg.error():
+                logger.error('Consumer error: %s', msg.error())
+                continue
+            batches.setdefault((msg.topic(), msg.partition()), []).append(msg)
+
+        for partition, batch in batches.items():
+            worker = self._worker(partition)
+            worker.queue.put_nowait(batch)
+            if worker.queue.qsize() >= MAX_PENDING_BATCHES and not worker.paused:
+                self._consumer.pause([TopicPartition(*partition)])
+                worker.paused = True
+
+    def _resume_drained(self) -> None:
+        resumed = [
+            worker
+            for worker in self._workers.values()
+            if worker.paused and worker.queue.qsize() < MAX_PENDING_BATCHES
+        ]
+        if resumed:
+            self._consumer.resume(
+                [TopicPartition(*worker.partition) for worker in resumed],
+            )
+        for worker in resumed:
+            worker.paused = False
+
+    def _commit(self, workers: list[PartitionWorker]) -> None:
+        pending = {
+            worker: worker.processed
+            for worker in workers
+            if worker.processed is not None and worker.processed != worker.committed
+        }
+        if not pending:
+            return
+
+        self._consumer.commit(
+            offsets=[
+                TopicPartition(*worker.partition, offset)
+                for worker, offset in pending.items()
+            ],
+            asynchronous=False,
+        )
+        for worker, offset in pending.items():
+            worker.committed = offset
+
+    def _on_revoke(self, _: Consumer, partitions: list[TopicPartition]) -> None:
+        # Runs in the consume() thread while the event loop is free
+        revoked = []
+        for partition in partitions:
+            worker = self._workers.pop((partition.topic, partition.partition), None)
+            if worker:
+                revoked.append(worker)
+        if not revoked:
+            return
+
+        asyncio.run_coroutine_threadsafe(
+            _drain_all(revoked),
+            self._loop,
+        ).result()
+        try:
+            self._commit(revoked)
+        except KafkaException:
+            logger.exception('Failed to commit revoked partitions')
+
+    def _on_lost(self, _: Consumer, partitions: list[TopicPartition]) -> None:
+        # Someone else owns them already, nothing may be committed
+        for partition in partitions:
+            worker = self._workers.pop((partition.topic, partition.partition), None)
+            if worker:
+                self._loop.call_soon_threadsafe(worker.cancel)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopped.is_set():
+            # consume blocks, keep it off the event loop
+            messages = await loop.run_in_executor(
+                None,
+                self._consumer.consume,
+                self.batch_size,
+                self.timeout,
+            )
+            self._dispatch(messages)
+            self._resume_drained()
+
+            workers = list(self._workers.values())
+            try:
+                await loop.run_in_executor(None, self._commit, workers)
+            except KafkaException:
+                logger.exception('Failed to commit offsets')
+            self._report(len(messages))
+
+    def _report(self, consumed: int) -> None:
+        self._consumed += consumed
+        elapsed = time.monotonic() - self._reported_at
+        if elapsed >= REPORT_INTERVAL:
+            logger.info(
+                'Consumed %d messages from %d partitions, %.1f msg/s',
+                self._consumed,
+                len(self._workers),
+                self._consumed / elapsed,
+            )
+            self._consumed = 0
+            self._reported_at = time.monotonic()
+
+    async def start(self) -> None:
+        settings = get_settings().kafka
+        self._loop = asyncio.get_running_loop()
+        self._consumer = Consumer(
+            {
+                'bootstrap.servers': settings.URI,
+                'group.id': settings.GROUP_ID,
+                'enable.auto.commit': False,
+                'auto.offset.reset': 'earliest',
+            },
+        )
+        topics = list(self.topics)
+        if self.retries:
+            for topic in self.topics:
+                topics += self.retries.retry_topics(topic)
+        self._consumer.subscribe(
+            topics,
+            on_revoke=self._on_revoke,
+            on_lost=self._on_lost,
+        )
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        # Let the pending consume() return instead of closing under it
+        self._stopped.set()
+        if self._task:
+            await self._task
+        if self._consumer:
+            # Leaving the group revokes every partition, draining the workers
+            await asyncio.to_thread(self._consumer.close)
+
+
+async def _drain_all(workers: list[PartitionWorker]) -> None:
+    await asyncio.gather(*(worker.drain() for worker in workers))
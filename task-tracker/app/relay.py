@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+import sqlalchemy as sa
+from confluent_kafka import KafkaException
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import maker
+from app.kafka import EVENT_HEADER, producer
+from app.models.entities import OutboxMessage
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Backoff after a failed batch, the broker or the database needs time
+ERROR_DELAY = 5
+
+
+class OutboxRelay:
+    '''Publishes outbox rows to Kafka and deletes them once delivered
+
+    Batches are claimed with FOR UPDATE SKIP LOCKED, so any number of relays
+    can run side by side; rows of a key still held by another relay are left
+    for later to keep per-key order. Rows are deleted only after the broker
+    acknowledged the whole batch, which makes delivery at-least-once.
+    '''
+
+    def __init__(self, batch_size: int, poll_interval: timedelta) -> None:
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval.total_seconds()
+        self._task: asyncio.Task[None] | None = None
+
+    async def relay_batch(self) -> int:
+        async with maker() as session:
+            result = await session.execute(
+                sa.select(
+                    OutboxMessage.id_,
+                    OutboxMessage.topic,
+                    OutboxMessage.key,
+                    OutboxMessage.name,
+                    OutboxMessage.value,
+                )
+                .order_by(OutboxMessage.id_)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True),
+            )
+            messages = result.all()
+            if not messages:
+                return 0
+
+            # Keys with older rows claimed by another relay wait for the next
+            # round, so events of one entity are never sent out of order
+            busy = await session.execute(
+                sa.select(OutboxMessage.key)
+                .distinct()
+                .where(
+                    OutboxMessage.key.in_([message.key for message in messages]),
+                    OutboxMessage.id_ < messages[-1].id_,
+                    OutboxMessage.id_.not_in([message.id_ for message in messages]),
+                ),
+            )
+            busy_keys = set(busy.scalars())
+            messages = [message for message in messages if message.key not in busy_keys]
+
+            await asyncio.gather(
+                *(
+                    producer.produce(
+                        message.topic,
+                        message.value,
+                        key=message.key,
+                        headers={EVENT_HEADER: message.name},
+                    )
+                    for message in messages
+                ),
+            )
+            await session.execute(
+                sa.delete(OutboxMessage).where(
+                    OutboxMessage.id_.in_([message.id_ for message in messages]),
+                ),
+            )
+            await session.commit()
+
+        return len(messages)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                sent = await self.relay_batch()
+            except (KafkaException, BufferError, OSError, SQLAlchemyError):
+                # BufferError: the producer queue is full until it flushes
+                logger.exception('Failed to relay outbox messages')
+                await asyncio.sleep(ERROR_DELAY)
+                continue
+            except Exception:
+                # The relay must outlive a bad batch, undelivered rows stay
+                logger.exception('Unexpected error while relaying outbox messages')
+                await asyncio.sleep(ERROR_DELAY)
+                continue
+
+            # A full batch means more rows are probably waiting
+            if sent < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        if get_settings().outbox.RELAY:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+relay = OutboxRelay(
+    batch_size=get_settings().outbox.BATCH_SIZE,
+    poll_interval=get_settings().outbox.POLL_INTERVAL,
+)
+
+
+async def _serve() -> None:
+    await producer.start()
+    try:
+        await relay.run()
+    finally:
+        await producer.stop()
+
+
+def main() -> None:
+    '''Run a standalone relay, alongside or instead of the in-app ones'''
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve())
+
+
+if __name__ == '__main__':
+    main()
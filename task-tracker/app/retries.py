@@ -0,0 +1,97 @@
+import time
+from collections.abc import Sequence
+from datetime import timedelta
+
+from confluent_kafka import Message
+
+from app.kafka import producer
+
+ATTEMPT_HEADER = 'retry-attempt'
+DUE_HEADER = 'retry-due'
+ERROR_HEADER = 'error'
+TOPIC_HEADER = 'original-topic'
+PARTITION_HEADER = 'original-partition'
+OFFSET_HEADER = 'original-offset'
+
+# Where the message was first consumed, kept by DLQ replays as well
+ORIGIN_HEADERS = frozenset({TOPIC_HEADER, PARTITION_HEADER, OFFSET_HEADER})
+RETRY_HEADERS = frozenset(
+    {
+        ATTEMPT_HEADER,
+        DUE_HEADER,
+        ERROR_HEADER,
+        TOPIC_HEADER,
+        PARTITION_HEADER,
+        OFFSET_HEADER,
+    },
+)
+
+MAX_ERROR_LENGTH = 1000
+
+
+def get_header(msg: Message, name: str) -> str | None:
+    for key, value in msg.headers() or ():
+        if key == name and value is not None:
+            return value.decode()
+    return None
+
+
+def original_offset(msg: Message) -> int:
+    '''Offset the message had on its original topic, before any retry'''
+
+    offset = get_header(msg, OFFSET_HEADER)
+    return int(offset) if offset else msg.offset()
+
+
+def dlq_topic(topic: str) -> str:
+    return f'{topic}.dlq'
+
+
+class RetryPolicy:
+    '''Tiered retry topics in front of a dead-letter topic
+
+    A message failing on `topic` goes to `topic.retry.1`, then
+    `topic.retry.2` and so on, each tier delaying it by its own amount, and
+    ends up on `topic.dlq` once the tiers are exhausted. The original
+    headers travel along, together with the attempt, due time and error.
+    '''
+
+    def __init__(self, delays: Sequence[timedelta]) -> None:
+        self.delays = [delay.total_seconds() for delay in delays]
+
+    def retry_topics(self, topic: str) -> list[str]:
+        return [
+            f'{topic}.retry.{attempt}' for attempt in range(1, len(self.delays) + 1)
+        ]
+
+    def due(self, msg: Message) -> float | None:
+        '''When a retried message may be handled again, as a unix time'''
+
+        due = get_header(msg, DUE_HEADER)
+        return float(due) if due else None
+
+    async def route(self, msg: Message, error: Exception, *, retry: bool) -> None:
+        '''Send a failed message to its next retry tier or to the DLQ'''
+
+        topic = get_header(msg, TOPIC_HEADER) or msg.topic()
+        attempt = int(get_header(msg, ATTEMPT_HEADER) or 0) + 1
+        headers = {
+            key: value
+            for key, value in msg.headers() or ()
+            if key not in RETRY_HEADERS and value is not None
+        }
+        headers |= {
+            ATTEMPT_HEADER: str(attempt),
+            ERROR_HEADER: f'{type(error).__name__}: {error}'[:MAX_ERROR_LENGTH],
+            TOPIC_HEADER: topic,
+            PARTITION_HEADER: get_header(msg, PARTITION_HEADER) or str(msg.partition()),
+            OFFSET_HEADER: get_header(msg, OFFSET_HEADER) or str(msg.offset()),
+        }
+
+        if retry and attempt <= len(self.delays):
+            target = self.retry_topics(topic)[attempt - 1]
+            headers[DUE_HEADER] = str(time.time() + self.delays[attempt - 1])
+        else:
+            target = dlq_topic(topic)
+
+        await producer.produce(target, msg.value(), msg.key(), headers=headers)
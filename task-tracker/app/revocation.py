@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+from confluent_kafka import Consumer, TopicPartition
+from pydantic import ValidationError
+
+from app.models.events import RevokedTokensBE
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+TOPIC = 'accounts.revoked'
+
+
+class RevocationSet:
+    '''Accounts whose tokens issued before some moment are revoked
+
+    Entries are dropped once every token they could match has expired, as
+    told by the revocation itself. `lifetime` is only assumed for
+    revocations that do not tell, and bounds how far back they are read.
+    '''
+
+    def __init__(self, lifetime: timedelta) -> None:
+        self.lifetime = lifetime.total_seconds()
+        # Revoked issue and expiry bounds per account
+        self._revoked: dict[UUID, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def revoke(
+        self,
+        pid: UUID,
+        issued_before: float,
+        expires_before: float | None = None,
+    ) -> None:
+        if expires_before is None:
+            expires_before = issued_before + self.lifetime
+        with self._lock:
+            if issued_before > self._revoked.get(pid, (0, 0))[0]:
+                self._revoked[pid] = (issued_before, expires_before)
+
+    def is_revoked(self, pid: UUID, issued_at: float) -> bool:
+        return issued_at < self._revoked.get(pid, (0, 0))[0]
+
+    def prune(self) -> None:
+        now = time.time()
+        with self._lock:
+            self._revoked = {
+                pid: revoked
+                for pid, revoked in self._revoked.items()
+                if revoked[1] >= now
+            }
+
+
+class RevocationListener:
+    '''Keeps a RevocationSet in sync with the revocation topic
+
+    Every process reads the whole stream with its own consumer group,
+    starting from the oldest revocation that can still matter.
+    '''
+
+    def __init__(self, revocations: RevocationSet) -> None:
+        self.revocations = revocations
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _on_assign(self, consumer: Consumer, partitions: list[TopicPartition]) -> None:
+        since = int((time.time() - self.revocations.lifetime) * 1000)
+        for partition in partitions:
+            partition.offset = since
+        consumer.assign(consumer.offsets_for_times(partitions, timeout=10))
+
+    def _run(self) -> None:
+        consumer = Consumer(
+            {
+                'bootstrap.servers': get_settings().kafka.URI,
+                'group.id': f'revocations-{uuid4()}',
+                'enable.auto.commit': False,
+                'auto.offset.reset': 'latest',
+            },
+        )
+        consumer.subscribe([TOPIC], on_assign=self._on_assign)
+        pruned_at = time.monotonic()
+        try:
+            while not self._stopped.is_set():
+                if time.monotonic() - pruned_at > self.revocations.lifetime:
+                    self.revocations.prune()
+                    pruned_at = time.monotonic()
+
+                msg = consumer.poll(1)
+                if msg is None:
+                    continue
+                if msg.error():
+                    logger.error('Revocation consumer error: %s', msg.error())
+                    continue
+
+                try:
+                    event = RevokedTokensBE.model_validate_json(msg.value())
+                except ValidationError:
+                    logger.exception('Malformed revocation event')
+                    continue
+                self.revocations.revoke(
+                    event.data.pid,
+                    event.data.issued_before,
+                    event.data.expires_before,
+                )
+        finally:
+            consumer.close()
+
+    async def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+
+
+revocations = RevocationSet(get_settings().auth.ACCESS_TOKEN_LIFETIME)
+revocation_listener = RevocationListener(revocations)
@@ -0,0 +1,76 @@
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from app.kafka import EVENT_HEADER
+from app.models.events import BaseEvent, EventMeta
+
+E = TypeVar('E', bound=BaseEvent)
+
+Handler = Callable[..., None]
+Headers = Sequence[tuple[str, bytes | None]] | None
+
+
+class _Envelope(BaseModel):
+    '''Only the meta of an event, `data` is skipped without validation'''
+
+    meta: EventMeta
+
+
+class EventRouter:
+    '''Dispatches raw messages to handlers by event name
+
+    The name is read from the `EVENT_HEADER` header and, for messages
+    produced without it, from a parse of `meta` alone. Only events with a
+    registered handler are validated in full, each against its own model.
+    '''
+
+    def __init__(self) -> None:
+        self._routes: dict[str, tuple[type[BaseEvent], Handler]] = {}
+
+    def route(self, name: str, event_type: type[E]) -> Callable[[Handler], Handler]:
+        def register(handler: Handler) -> Handler:
+            self._routes[name] = (event_type, handler)
+            return handler
+
+        return register
+
+    def event_name(self, value: bytes, headers: Headers) -> str:
+        '''Raises ValidationError if there is no header and no valid meta'''
+
+        for key, header in headers or ():
+            if key == EVENT_HEADER and header:
+                return header.decode()
+
+        return _Envelope.model_validate_json(value).meta.name
+
+    def decode(self, value: bytes, headers: Headers) -> BaseEvent | None:
+        '''The event validated against its model, None if nobody handles it
+
+        Raises ValidationError if the event does not match its model, or its
+        name cannot be told at all.
+        '''
+
+        route = self._routes.get(self.event_name(value, headers))
+        if route is None:
+            return None
+
+        event_type, _ = route
+        return event_type.model_validate_json(value)
+
+    def apply(self, event: BaseEvent, *args: object) -> None:
+        '''Pass a decoded event and `args` to its handler'''
+
+        _, handler = self._routes[event.meta.name]
+        handler(event, *args)
+
+    def dispatch(self, value: bytes, headers: Headers, *args: object) -> bool:
+        '''Decode and apply the event, False if there is no handler for it'''
+
+        event = self.decode(value, headers)
+        if event is None:
+            return False
+
+        self.apply(event, *args)
+        return True
@@ -1,11 +1,14 @@
+from datetime import timedelta
 from functools import cache
 from ipaddress import IPv4Address
-from typing import Any, cast
+from typing import Any, Literal, cast
 
 from dotenv import find_dotenv
 from pydantic import (
     HttpUrl,
     KafkaDsn,
+    NonNegativeFloat,
+    NonNegativeInt,
     PositiveInt,
     PostgresDsn,
     SecretStr,
@@ -62,6 +65,21 @@ class KafkaSettings(EnvSettings):
     USER: str | None = None
     PASSWORD: SecretStr | None = None
     URI: KafkaDsn | None = None
+    COMPRESSION: Literal['none', 'gzip', 'snappy', 'lz4', 'zstd'] = 'zstd'
+    LINGER_MS: NonNegativeInt = 5
+    BATCH_SIZE: PositiveInt = 1_000_000
+    ACKS: Literal['0', '1', 'all'] = 'all'
+    GROUP_ID: str = 'task-tracker'
+    CONSUME_BATCH_SIZE: PositiveInt = 500
+    CONSUME_TIMEOUT: timedelta = timedelta(seconds=1)
+    RETRY_DELAYS: tuple[timedelta, ...] = (
+        timedelta(seconds=10),
+        timedelta(minutes=1),
+        timedelta(minutes=10),
+    )
+    PROCESSED_CACHE_SIZE: PositiveInt = 100_000
+    # Longer than any redelivery or DLQ replay is expected to take
+    PROCESSED_RETENTION: timedelta = timedelta(days=7)
 
     @validator('URI')
     def assemble_uri(
@@ -111,8 +129,48 @@ class AuthSettings(EnvSettings):
 
     ID: str
     SECRET: str
-    TOKEN_URL: HttpUrl = HttpUrl('http://auth:5550/srv/token')
-    VERIFY_URL: HttpUrl = HttpUrl('http://auth:5550/srv/verify')
+    TOKEN_URL: HttpUrl = HttpUrl('http://auth:5550/srv/sso/token')
+    JWKS_URL: HttpUrl = HttpUrl('http://auth:5550/srv/.well-known/jwks.json')
+    JWKS_REFRESH_INTERVAL: timedelta = timedelta(minutes=5)
+    # At least JWT_LIFETIME of auth, revocations are read back that far
+    ACCESS_TOKEN_LIFETIME: timedelta = timedelta(minutes=15)
+
+    CACHE_SIZE: PositiveInt = 10_000
+    CACHE_TTL: timedelta = timedelta(minutes=5)
+
+
+class TasksSettings(EnvSettings):
+    model_config = SettingsConfigDict(env_prefix='TASKS_')
+
+    ASSIGNMENT: Literal['random', 'least_loaded'] = 'random'
+    ASSIGNEES_REBUILD_INTERVAL: timedelta = timedelta(minutes=5)
+
+
+class HTTPSettings(EnvSettings):
+    '''Pooled client for calls to other services'''
+
+    model_config = SettingsConfigDict(env_prefix='HTTP_')
+
+    MAX_CONNECTIONS: PositiveInt = 100
+    MAX_KEEPALIVE_CONNECTIONS: PositiveInt = 20
+    KEEPALIVE_EXPIRY: timedelta = timedelta(seconds=30)
+    HTTP2: bool = False  # needs the `h2` package, `httpx[http2]`
+    TIMEOUT: timedelta = timedelta(seconds=5)
+    CONNECT_TIMEOUT: timedelta = timedelta(seconds=2)
+    POOL_TIMEOUT: timedelta = timedelta(seconds=1)
+    RETRIES: NonNegativeInt = 2
+    RETRY_BACKOFF: timedelta = timedelta(milliseconds=100)
+    RETRY_BUDGET: NonNegativeFloat = 0.1  # retries per request
+
+
+class OutboxSettings(EnvSettings):
+    '''Outbox relay settings'''
+
+    model_config = SettingsConfigDict(env_prefix='OUTBOX_')
+
+    RELAY: bool = True  # run a relay inside every app process
+    BATCH_SIZE: PositiveInt = 1000
+    POLL_INTERVAL: timedelta = timedelta(milliseconds=500)
 
 
 class Settings(EnvSettings):
@@ -123,6 +181,7 @@ class Settings(EnvSettings):
     VERSION: str = '0.1.0'
 
     ORIGIN_REGEX: str = '.*'
+    GZIP_MINIMUM_SIZE: PositiveInt = 1000
 
     HOST: IPv4Address = IPv4Address('0.0.0.0')  # noqa: S104
     PORT: PositiveInt
@@ -130,8 +189,11 @@ class Settings(EnvSettings):
 
     auth: AuthSettings = AuthSettings()
     db: PostgresSettings = PostgresSettings()
+    http: HTTPSettings = HTTPSettings()
     kafka: KafkaSettings = KafkaSettings()
+    outbox: OutboxSettings = OutboxSettings()
     scheme_registry: SchemeRegistrySettings = SchemeRegistrySettings()
+    tasks: TasksSettings = TasksSettings()
 
 
 @cache
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from functools import partial
+from hashlib import sha256
+from uuid import UUID
+
+
+@dataclass(frozen=True, slots=True)
+class VerifiedToken:
+    '''Result of a successful token verification'''
+
+    pid: UUID
+    issued_at: float
+    expires_at: float
+
+
+Loader = Callable[[str], Awaitable[VerifiedToken]]
+
+
+class TokenCache:
+    '''Bounded LRU of verified tokens with single-flight loading
+
+    Entries are keyed by the token hash and expire at the JWT `exp`
+    or after `ttl`, whichever comes first. Concurrent lookups of the same
+    token share one in-flight loader call; failures are never cached.
+    '''
+
+    def __init__(self, maxsize: int, ttl: timedelta) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl.total_seconds()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[bytes, VerifiedToken] = OrderedDict()
+        self._inflight: dict[bytes, asyncio.Future[VerifiedToken]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, token: str, loader: Loader) -> VerifiedToken:
+        key = sha256(token.encode()).digest()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            del self._entries[key]
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(loader(token))
+            future.add_done_callback(partial(self._on_loaded, key))
+            self._inflight[key] = future
+        else:
+            self.coalesced += 1
+
+        # A cancelled request must not cancel the call shared with other waiters
+        return await asyncio.shield(future)
+
+    def _on_loaded(self, key: bytes, future: asyncio.Future[VerifiedToken]) -> None:
+        del self._inflight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        result = future.result()
+        expires_at = min(result.expires_at, time.time() + self.ttl)
+        self._entries[key] = replace(result, expires_at=expires_at)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+        }
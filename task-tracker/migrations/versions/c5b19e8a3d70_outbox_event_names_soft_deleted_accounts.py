@@ -0,0 +1,35 @@
+'''outbox event names, soft-deleted accounts
+
+Revision ID: c5b19e8a3d70
+Revises: e04c9b6d2f17
+Create Date: 2026-10-18 19:49:03.771946
+
+'''
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5b19e8a3d70'
+down_revision: str | None = 'e04c9b6d2f17'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Rows queued before the upgrade get an empty name, routed by a meta parse
+    op.add_column(
+        'outbox',
+        sa.Column('name', sa.String(), server_default='', nullable=False),
+    )
+    op.alter_column('outbox', 'name', server_default=None)
+    op.add_column(
+        'accounts',
+        sa.Column('deleted', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('accounts', 'deleted')
+    op.drop_column('outbox', 'name')
@@ -0,0 +1,122 @@
+'''Account event decoding: full validation vs the event router
+
+Run inside the service environment (settings are read from `.env`):
+
+    poetry run bench-events --messages 100000 --unknown 0.5
+'''
+import argparse
+import random
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from uuid import uuid4
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.consumer import Changes, router
+from app.kafka import EVENT_HEADER
+from app.models.enums import Role
+from app.models.events import (
+    CreateAccountCUD,
+    CreateAccountData,
+    CreatedTaskCUD,
+    CreatedTaskData,
+    DeleteAccountCUD,
+    DeleteAccountData,
+    EventMeta,
+    UpdateAccountCUD,
+    UpdateAccountData,
+)
+
+Message = tuple[bytes, list[tuple[str, bytes]]]
+
+# What a consumer without routing has to do: try every known event model
+_any_event = TypeAdapter(
+    CreateAccountCUD | UpdateAccountCUD | DeleteAccountCUD | CreatedTaskCUD,
+)
+
+
+def _message(unknown: float) -> Message:
+    pid = uuid4()
+    if random.random() < unknown:  # noqa: S311
+        event = CreatedTaskCUD(
+            meta=EventMeta(name='Tasks.Created'),
+            data=CreatedTaskData(
+                pid=pid,
+                description='x' * 200,
+                assignee=uuid4(),
+                fee=10,
+                award=20,
+            ),
+        )
+    else:
+        event = random.choice(  # noqa: S311
+            [
+                CreateAccountCUD(
+                    meta=EventMeta(name='Accounts.CreateAccount'),
+                    data=CreateAccountData(pid=pid, role=Role.worker, email='a@b.c'),
+                ),
+                UpdateAccountCUD(
+                    meta=EventMeta(name='Accounts.UpdateAccount'),
+                    data=UpdateAccountData(pid=pid, role=Role.manager, email='a@b.c'),
+                ),
+                DeleteAccountCUD(
+                    meta=EventMeta(name='Accounts.DeleteAccount'),
+                    data=DeleteAccountData(pid=pid),
+                ),
+            ],
+        )
+
+    return event.model_dump_json().encode(), [(EVENT_HEADER, event.meta.name.encode())]
+
+
+def _full(messages: list[Message]) -> None:
+    for value, _ in messages:
+        with suppress(ValidationError):
+            _any_event.validate_json(value)
+
+
+def _routed(messages: list[Message]) -> None:
+    changes: Changes = {}
+    for offset, (value, headers) in enumerate(messages):
+        router.dispatch(value, headers, changes, offset)
+
+
+def _routed_without_headers(messages: list[Message]) -> None:
+    changes: Changes = {}
+    for offset, (value, _) in enumerate(messages):
+        router.dispatch(value, None, changes, offset)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument(
+        '--unknown',
+        type=float,
+        default=0.5,
+        help='share of events nobody handles',
+    )
+    args = parser.parse_args()
+
+    messages = [_message(args.unknown) for _ in range(args.messages)]
+    modes: list[tuple[str, Callable[[list[Message]], None]]] = [
+        ('full', _full),
+        ('router', _routed),
+        ('no header', _routed_without_headers),
+    ]
+
+    print(f'{args.messages} messages, {args.unknown:.0%} unknown\n')
+    print(f'{"mode":<12}{"msg/s":>12}{"us/msg":>10}')
+    for name, decode in modes:
+        started = time.perf_counter()
+        decode(messages)
+        elapsed = time.perf_counter() - started
+        print(
+            f'{name:<12}{args.messages / elapsed:>12.0f}'
+            f'{elapsed / args.messages * 1e6:>10.2f}',
+        )
+
+
+if __name__ == '__main__':
+    main()